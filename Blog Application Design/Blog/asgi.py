@@ -12,5 +12,9 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Blog.settings')
+# ASGI 下默认使用异步视图，设为 0 可以退回同步视图
+os.environ.setdefault('BLOGS_ASYNC_VIEWS', '1')
+# 告诉 settings 当前由 ASGI 服务器加载（关闭持久连接，见 settings.DATABASES）
+os.environ['BLOGS_ASGI'] = '1'
 
 application = get_asgi_application()
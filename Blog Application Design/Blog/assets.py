@@ -0,0 +1,57 @@
+"""
+生产环境（DEBUG = False）下直接由 Django 发送 collectstatic 收集好的静态文件。
+
+前面有 nginx 之类的反向代理时，最好让它直接读 STATIC_ROOT，这个视图只是兜底。
+带内容哈希的文件名内容不会变，缓存一年；浏览器支持时优先发送预压缩的 .br / .gz。
+"""
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+# ManifestStaticFilesStorage 生成的文件名：name.<12 位十六进制>.ext
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.[^/.]+$')
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+# 没有哈希的文件（比如直接引用原文件名）可能会变，只缓存一小会儿
+SHORT = 'public, max-age=300'
+
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+
+def serve_static(request, path):
+    if not settings.STATIC_ROOT:
+        raise Http404('未配置 STATIC_ROOT')
+    try:
+        fullpath = safe_join(settings.STATIC_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('路径不合法')
+    if not os.path.isfile(fullpath):
+        raise Http404('文件不存在')
+
+    stat = os.stat(fullpath)
+    if not was_modified_since(request.headers.get('If-Modified-Since'), stat.st_mtime):
+        return HttpResponseNotModified()
+
+    content_type = mimetypes.guess_type(fullpath)[0] or 'application/octet-stream'
+    accepted = request.headers.get('Accept-Encoding', '')
+    encoding, filename = None, fullpath
+    for name, suffix in ENCODINGS:
+        if name in accepted and os.path.isfile(fullpath + suffix):
+            encoding, filename = name, fullpath + suffix
+            break
+
+    response = FileResponse(open(filename, 'rb'), content_type=content_type)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Last-Modified'] = http_date(stat.st_mtime)
+    response.headers['Cache-Control'] = IMMUTABLE if HASHED_NAME.search(path) else SHORT
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
@@ -0,0 +1,33 @@
+"""
+区分“进程内”缓存和多个工作进程共享的缓存。
+
+文章版本号、会话这类数据必须所有工作进程看到同一份，
+放在 LocMemCache 里时每个进程各记各的：一个进程里的更新，别的进程看不到。
+这里的系统检查在启动时（runserver、migrate、check 等）提示这种配置。
+"""
+from django.conf import settings
+from django.core.checks import Warning
+
+# 数据只存在当前进程里的缓存后端
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def is_process_local(alias):
+    return settings.CACHES[alias]['BACKEND'] in PROCESS_LOCAL_BACKENDS
+
+
+def check_shared_alias(setting, check_id, purpose):
+    """settings 中名为 setting 的缓存别名必须存在，并且是多进程共享的后端"""
+    alias = getattr(settings, setting)
+    if alias not in settings.CACHES:
+        return [Warning(f'{setting} = {alias!r} 不在 CACHES 里。', id=f'{check_id}1')]
+    if is_process_local(alias):
+        return [Warning(
+            f'{setting} 指向的缓存 {alias!r} 只在当前进程内有效，{purpose}在多个工作进程之间不同步。',
+            hint='换成 FileBasedCache、Redis、Memcached 等多进程共享的缓存后端。',
+            id=f'{check_id}2',
+        )]
+    return []
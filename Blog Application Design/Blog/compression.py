@@ -0,0 +1,171 @@
+"""
+响应压缩中间件，替代 django.middleware.gzip.GZipMiddleware。
+
+- 装了 brotli 并且浏览器支持时用 br，否则用 gzip；
+- 小于 COMPRESS_MIN_SIZE 的响应、不在 COMPRESS_CONTENT_TYPES 里的类型
+  （图片、压缩包等本来就压不小的）直接原样返回；
+- 流式响应（NDJSON 导出、流式列表页）边压缩边发送，每块都 flush，
+  浏览器收到的第一块不用等整个页面压缩完。同步、异步迭代器都支持。
+- 缓解 BREACH：gzip 输出（整块的和流式的都一样）在头里加随机长度的文件名，
+  让压缩后的长度带上随机噪声。br 没有能放填充的地方，所以响应里可能有秘密
+  （用到了 CSRF token，或者是登录用户的页面）时不用 br，改用加了填充的 gzip。
+"""
+import secrets
+import struct
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:  # 没装 brotli 时只用 gzip
+    brotli = None
+
+DEFAULT_CONTENT_TYPES = [
+    'text/html', 'text/css', 'text/plain', 'text/javascript', 'application/javascript',
+    'application/json', 'application/x-ndjson', 'image/svg+xml',
+]
+
+# 动态内容用中等压缩级别：再往上压缩率提高很少，CPU 时间却成倍增加
+BROTLI_QUALITY = 5
+GZIP_LEVEL = 6
+
+
+def choose_encoding(accept_encoding, allow_brotli=True):
+    """按 Accept-Encoding 选出压缩方式（'br' / 'gzip'），都不接受时返回 None"""
+    accepted = set()
+    for item in accept_encoding.split(','):
+        name, _, params = item.strip().partition(';')
+        # q=0 表示明确拒绝
+        if params.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        accepted.add(name.strip().lower())
+    if allow_brotli and brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+class StreamCompressor:
+    """
+    增量压缩：compress() 每次都把已压缩的数据冲出来，finish() 写入结尾。
+    gzip 的头尾在这里自己写，max_random_bytes 大于 0 时头里带一个随机长度的文件名
+    """
+
+    def __init__(self, encoding, max_random_bytes=0):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            # 负的 wbits 表示只输出 deflate 数据，不带 zlib / gzip 头尾
+            self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, -zlib.MAX_WBITS)
+            self._header = gzip_header(max_random_bytes)
+            self._crc = 0
+            self._size = 0
+
+    def compress(self, chunk, flush=True):
+        if self.encoding == 'br':
+            data = self._compressor.process(chunk)
+            return data + self._compressor.flush() if flush else data
+        self._crc = zlib.crc32(chunk, self._crc)
+        self._size += len(chunk)
+        data = self._pop_header() + self._compressor.compress(chunk)
+        return data + self._compressor.flush(zlib.Z_SYNC_FLUSH) if flush else data
+
+    def finish(self):
+        if self.encoding == 'br':
+            return self._compressor.finish()
+        # gzip 结尾：未压缩数据的 CRC32 和长度（模 2**32）
+        return (self._pop_header() + self._compressor.flush()
+                + struct.pack('<II', self._crc, self._size & 0xffffffff))
+
+    def _pop_header(self):
+        header, self._header = self._header, b''
+        return header
+
+
+def gzip_header(max_random_bytes=0):
+    """gzip 头；和 Django 的 compress_string 一样，随机长度的文件名就是填充"""
+    if not max_random_bytes:
+        return b'\x1f\x8b\x08\x00' + bytes(4) + b'\x00\xff'
+    # FLG.FNAME 置位，头后面跟一个以 0 结尾的文件名
+    return b'\x1f\x8b\x08\x08' + bytes(4) + b'\x00\xff' + b'a' * secrets.randbelow(max_random_bytes) + b'\x00'
+
+
+def may_contain_secrets(request, response):
+    """响应里可能有 BREACH 能猜出来的秘密：页面用到了 CSRF token，或者是登录用户看到的页面"""
+    # 压缩中间件在 CsrfViewMiddleware 外层，这时 CSRF_COOKIE_NEEDS_UPDATE 已经被它清掉了；
+    # 页面调用过 get_token 的标志是响应里重新下发了 CSRF cookie
+    if settings.CSRF_COOKIE_NAME in response.cookies:
+        return True
+    # token 存在会话里时没有 cookie 可看，只要请求带着 CSRF 秘密就按用到了处理
+    if settings.CSRF_USE_SESSIONS and 'CSRF_COOKIE' in request.META:
+        return True
+    user = getattr(request, 'user', None)
+    return user is not None and user.is_authenticated
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    # 所有 gzip 输出的头里最多加这么多随机字节，缓解 BREACH 攻击（和 GZipMiddleware 相同）
+    max_random_bytes = 100
+
+    def process_response(self, request, response):
+        min_size = getattr(settings, 'COMPRESS_MIN_SIZE', 500)
+        if not response.streaming and len(response.content) < min_size:
+            return response
+        if response.has_header('Content-Encoding'):
+            return response
+        if 'no-transform' in response.get('Cache-Control', ''):
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type not in getattr(settings, 'COMPRESS_CONTENT_TYPES', DEFAULT_CONTENT_TYPES):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        # br 加不了填充，可能带秘密的响应只用 gzip
+        allow_brotli = getattr(settings, 'COMPRESS_BROTLI', True) and not may_contain_secrets(request, response)
+        encoding = choose_encoding(request.headers.get('Accept-Encoding', ''), allow_brotli)
+        if encoding is None:
+            return response
+
+        compressor = StreamCompressor(encoding, self.max_random_bytes)
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = self._acompress(response.streaming_content, compressor)
+            else:
+                response.streaming_content = self._compress(response.streaming_content, compressor)
+            # 压缩后的长度要发完才知道
+            del response.headers['Content-Length']
+        else:
+            compressed = compressor.compress(response.content, flush=False) + compressor.finish()
+            # 压缩后反而更大就发原文
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # 内容编码变了，强 ETag 改成弱 ETag，条件请求仍然能匹配
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    @staticmethod
+    def _compress(iterator, compressor):
+        for chunk in iterator:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.finish()
+
+    @staticmethod
+    async def _acompress(iterator, compressor):
+        async for chunk in iterator:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.finish()
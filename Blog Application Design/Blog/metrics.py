@@ -0,0 +1,263 @@
+"""
+请求级性能统计。
+
+MetricsMiddleware 按视图（'blogs:index'、'users:register' 等）记录：
+总耗时、SQL 条数和耗时（每个数据库连接上的 execute_wrapper）、模板渲染耗时
+（TimedDjangoTemplates 模板后端）、响应大小，汇总成进程内的直方图，
+由 metrics 视图以 Prometheus 文本格式输出（仅限 staff）。
+
+每个工作进程各自统计，Prometheus 按实例分别抓取后再汇总。
+METRICS_SAMPLE_RATE 控制抽样比例，设为 0 时中间件直接放行，几乎没有开销；
+METRICS_SLOW_REQUEST_MS 不为 None 时，超过该耗时的请求连同 SQL 一起写进日志。
+"""
+import contextlib
+import contextvars
+import logging
+import random
+import threading
+import time
+from bisect import bisect_left
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from django.template.backends.django import DjangoTemplates
+
+logger = logging.getLogger(__name__)
+
+TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+# 指标名 -> (说明, 桶上界)
+METRICS = {
+    'blog_request_duration_seconds': ('请求总耗时', TIME_BUCKETS),
+    'blog_db_queries': ('每个请求执行的 SQL 条数', COUNT_BUCKETS),
+    'blog_db_duration_seconds': ('每个请求的 SQL 总耗时', TIME_BUCKETS),
+    'blog_template_render_seconds': ('每个请求的模板渲染耗时', TIME_BUCKETS),
+    'blog_response_size_bytes': ('响应体大小', SIZE_BUCKETS),
+}
+
+# 慢请求日志里最多带多少条 SQL
+SLOW_LOG_MAX_QUERIES = 50
+
+# 当前请求的 RequestRecorder；没有抽中时为 None
+_current = contextvars.ContextVar('metrics_recorder', default=None)
+
+
+class Histogram:
+    """Prometheus 风格的直方图：每个桶记录 <= 上界的观测次数"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 最后一个是 +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """[(上界, 累计次数)]，最后一项上界是 '+Inf'"""
+        total, result = 0, []
+        for bound, count in zip(list(self.buckets) + ['+Inf'], self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+class Registry:
+    """进程内所有直方图，按 (指标名, 视图名) 分开"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+
+    def observe(self, name, view, value):
+        with self._lock:
+            histogram = self._histograms.get((name, view))
+            if histogram is None:
+                histogram = self._histograms[(name, view)] = Histogram(METRICS[name][1])
+            histogram.observe(value)
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def render(self):
+        """输出 Prometheus 文本格式"""
+        lines = []
+        with self._lock:
+            for name, (help_text, _) in METRICS.items():
+                views = sorted(view for metric, view in self._histograms if metric == name)
+                if not views:
+                    continue
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for view in views:
+                    histogram = self._histograms[(name, view)]
+                    label = view.replace('\\', '\\\\').replace('"', '\\"')
+                    for bound, count in histogram.cumulative():
+                        lines.append(f'{name}_bucket{{view="{label}",le="{bound}"}} {count}')
+                    lines.append(f'{name}_sum{{view="{label}"}} {histogram.sum}')
+                    lines.append(f'{name}_count{{view="{label}"}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+class RequestRecorder:
+    """一个请求内的累计数据，同时作为 execute_wrapper 统计 SQL"""
+
+    def __init__(self, keep_sql):
+        self.keep_sql = keep_sql
+        self.queries = 0
+        self.db_time = 0.0
+        self.sql = []
+        self.template_time = 0.0
+        self.rendering = False  # 嵌套渲染（比如模板标签里再渲染模板）只算最外层
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.queries += 1
+            self.db_time += elapsed
+            if self.keep_sql and len(self.sql) < SLOW_LOG_MAX_QUERIES:
+                self.sql.append((elapsed, sql))
+
+    @contextlib.contextmanager
+    def installed(self):
+        """请求期间把 SQL 统计记到这个对象上"""
+        token = _current.set(self)
+        try:
+            # 当前线程已经打开的连接（包括只读副本）；异步视图的查询跑在 sync_to_async 的
+            # 工作线程里，那些线程有自己的连接，建立连接时由 connection_created 挂上
+            for alias in connections:
+                install_query_wrapper(connections[alias])
+            yield
+        finally:
+            _current.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    """挂在每个数据库连接上的 execute_wrapper，把查询记到当前请求的 RequestRecorder 上"""
+    recorder = _current.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def install_query_wrapper(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(install_query_wrapper, dispatch_uid='Blog.metrics.install_query_wrapper')
+
+
+class TimedTemplate:
+    """包一层 render()，把渲染耗时记到当前请求上"""
+
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        recorder = _current.get()
+        if recorder is None or recorder.rendering:
+            return self.template.render(context, request)
+        recorder.rendering = True
+        start = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            recorder.template_time += time.perf_counter() - start
+            recorder.rendering = False
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """和 DjangoTemplates 一样，只是渲染时计时，在 TEMPLATES 里替换 BACKEND 即可"""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def sampled(self):
+        rate = getattr(settings, 'METRICS_SAMPLE_RATE', 1.0)
+        return rate >= 1 or (rate > 0 and random.random() < rate)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+        recorder = RequestRecorder(self.slow_threshold() is not None)
+        start = time.perf_counter()
+        with recorder.installed():
+            response = self.get_response(request)
+        self.record(request, response, recorder, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+        recorder = RequestRecorder(self.slow_threshold() is not None)
+        start = time.perf_counter()
+        with recorder.installed():
+            response = await self.get_response(request)
+        self.record(request, response, recorder, time.perf_counter() - start)
+        return response
+
+    @staticmethod
+    def slow_threshold():
+        return getattr(settings, 'METRICS_SLOW_REQUEST_MS', None)
+
+    def record(self, request, response, recorder, elapsed):
+        match = request.resolver_match
+        view = match.view_name if match else '<unmatched>'
+        REGISTRY.observe('blog_request_duration_seconds', view, elapsed)
+        REGISTRY.observe('blog_db_queries', view, recorder.queries)
+        REGISTRY.observe('blog_db_duration_seconds', view, recorder.db_time)
+        REGISTRY.observe('blog_template_render_seconds', view, recorder.template_time)
+        # 流式响应的大小要等发送完才知道，这里不统计
+        if not response.streaming:
+            REGISTRY.observe('blog_response_size_bytes', view, len(response.content))
+
+        threshold = self.slow_threshold()
+        if threshold is not None and elapsed * 1000 >= threshold:
+            sql = '\n'.join(f'  {duration * 1000:.1f}ms  {statement}' for duration, statement in recorder.sql)
+            logger.warning(
+                '慢请求 %s %s (%s)：%.1fms，%d 条 SQL 共 %.1fms，模板 %.1fms\n%s',
+                request.method, request.path, view, elapsed * 1000,
+                recorder.queries, recorder.db_time * 1000, recorder.template_time * 1000, sql,
+            )
+
+
+def metrics(request):
+    """Prometheus 抓取地址，只有 staff 用户可以访问"""
+    if not request.user.is_staff:
+        raise PermissionDenied
+    return HttpResponse(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
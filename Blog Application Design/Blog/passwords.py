@@ -0,0 +1,43 @@
+"""
+密码哈希策略，在 settings.PASSWORD_HASH_POLICY 里选择。
+
+PASSWORD_HASHERS 的第一项用来给新密码加密，其余各项只用来校验旧密码。
+用户用旧算法的密码登录成功时，Django 会自动用第一项重新加密并保存，
+所以切换策略不需要用户重置密码，活跃用户登录一次就迁移过去了。
+"""
+import importlib.util
+
+from django.core.exceptions import ImproperlyConfigured
+
+PBKDF2 = 'django.contrib.auth.hashers.PBKDF2PasswordHasher'
+PBKDF2_SHA1 = 'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher'
+ARGON2 = 'django.contrib.auth.hashers.Argon2PasswordHasher'
+SCRYPT = 'django.contrib.auth.hashers.ScryptPasswordHasher'
+BCRYPT = 'django.contrib.auth.hashers.BCryptSHA256PasswordHasher'
+
+# 策略 -> 首选算法；其余算法按固定顺序排在后面，保证旧密码都还能校验
+PREFERRED = {
+    # Django 默认：迭代上百万次 SHA256，每次登录的 CPU 开销最大
+    'pbkdf2': PBKDF2,
+    # 内存困难型，单次校验的 CPU 时间明显更短；Python 自带，无需额外依赖
+    'scrypt': SCRYPT,
+    # 同样是内存困难型，需要 pip install argon2-cffi
+    'argon2': ARGON2,
+}
+VERIFY_ONLY = [PBKDF2, PBKDF2_SHA1, SCRYPT, ARGON2, BCRYPT]
+
+# 需要第三方库的算法：(模块名, pip 包名)
+REQUIRES = {ARGON2: ('argon2', 'argon2-cffi')}
+
+
+def password_hashers(policy):
+    """由策略名得到 PASSWORD_HASHERS 列表"""
+    try:
+        preferred = PREFERRED[policy]
+    except KeyError:
+        raise ImproperlyConfigured(
+            f'未知的 PASSWORD_HASH_POLICY {policy!r}，可选：{", ".join(PREFERRED)}')
+    module, package = REQUIRES.get(preferred, (None, None))
+    if module and importlib.util.find_spec(module) is None:
+        raise ImproperlyConfigured(f'PASSWORD_HASH_POLICY = {policy!r} 需要先安装 {package}')
+    return [preferred] + [hasher for hasher in VERIFY_ONLY if hasher != preferred]
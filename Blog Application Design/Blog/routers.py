@@ -0,0 +1,115 @@
+"""
+主库 / 只读副本路由。
+
+settings.DATABASE_REPLICAS 里配置副本的数据库别名。列表类页面（主页、作者页、
+搜索、JSON 接口）用 @reads_from_replica 标记后，其中对 blogs 应用的查询会分到副本上；
+其余读写，包括会话、用户、发文、编辑页的表单，都留在 default 主库。
+
+用户刚写过数据（任何非 GET/HEAD 请求）后，PinPrimaryMiddleware 会下发一个短期 cookie，
+有效期内这个用户的列表页也读主库，这样发文后跳回主页一定能看到自己的文章。
+
+列表片段缓存的 key 里带着读的是哪个库（见 current_read_alias）：副本落后时，
+从副本查出的旧数据即使缓存到了新版本号下，也只会被其他读副本的请求读到，
+读主库的请求有自己的片段，不受影响。副本读者最多看到 BLOGS_FRAGMENT_TIMEOUT 秒的旧数据。
+"""
+import contextvars
+import functools
+import random
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.utils.deprecation import MiddlewareMixin
+
+PIN_COOKIE = 'pin_primary'
+
+# 当前请求选中的副本别名；None 表示读主库
+_replica = contextvars.ContextVar('replica', default=None)
+
+
+def current_read_alias():
+    """当前请求里 blogs 的读查询发往哪个库"""
+    return _replica.get() or 'default'
+
+
+def choose_replica(request):
+    """为这次请求挑一个副本；没有副本或用户刚写过数据时返回 None"""
+    replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+    if not replicas or request.COOKIES.get(PIN_COOKIE):
+        return None
+    return random.choice(replicas)
+
+
+def reads_from_replica(view):
+    """视图装饰器：视图执行期间，blogs 的读查询走副本"""
+    if iscoroutinefunction(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            token = _replica.set(choose_replica(request))
+            try:
+                response = await view(request, *args, **kwargs)
+                if response.streaming and response.is_async:
+                    response.streaming_content = _ain_context(_replica.get(), response.streaming_content)
+                return response
+            finally:
+                _replica.reset(token)
+    else:
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            token = _replica.set(choose_replica(request))
+            try:
+                response = view(request, *args, **kwargs)
+                # 流式响应在视图返回后才真正查询，要让生成器里的查询也走副本
+                if response.streaming:
+                    response.streaming_content = _in_context(_replica.get(), response.streaming_content)
+                return response
+            finally:
+                _replica.reset(token)
+    return wrapper
+
+
+def _in_context(alias, iterator):
+    token = _replica.set(alias)
+    try:
+        yield from iterator
+    finally:
+        _replica.reset(token)
+
+
+async def _ain_context(alias, iterator):
+    token = _replica.set(alias)
+    try:
+        async for chunk in iterator:
+            yield chunk
+    finally:
+        _replica.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """只把 blogs 应用在列表视图里的读查询发往副本，其余全部走主库"""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label == 'blogs':
+            return _replica.get()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # 主库和副本数据相同，跨库关联没有问题
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # 副本的表结构由复制同步，不在副本上执行迁移
+        return db not in getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+class PinPrimaryMiddleware(MiddlewareMixin):
+    """写请求之后的 REPLICA_PIN_SECONDS 秒内，把该用户的读请求固定在主库"""
+
+    def process_response(self, request, response):
+        if (getattr(settings, 'DATABASE_REPLICAS', [])
+                and request.method not in ('GET', 'HEAD', 'OPTIONS')):
+            response.set_cookie(PIN_COOKIE, '1', max_age=getattr(settings, 'REPLICA_PIN_SECONDS', 5),
+                                httponly=True, samesite='Lax')
+        return response
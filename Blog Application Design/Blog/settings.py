@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from . import passwords, sqlite
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -44,20 +47,26 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # 放在最外层，统计的耗时包含其他所有中间件
+    'Blog.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # 压缩要在其他中间件改完响应之后进行，所以放在靠前的位置
+    'Blog.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'Blog.routers.PinPrimaryMiddleware',
 ]
 
 ROOT_URLCONF = 'Blog.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # 和 DjangoTemplates 相同，另外统计每个请求的模板渲染耗时
+        'BACKEND': 'Blog.metrics.TimedDjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -76,13 +85,89 @@ WSGI_APPLICATION = 'Blog.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
+# 每个新连接都会执行的 SQLite PRAGMA
+SQLITE_PRAGMAS = {
+    # WAL：读写互不阻塞，写入时读者仍能读到上一次提交的数据
+    'journal_mode': 'WAL',
+    # WAL 模式下 NORMAL 已经不会损坏数据库，只在断电时可能丢最后几个事务
+    'synchronous': 'NORMAL',
+    # 用内存映射读数据库文件（字节）
+    'mmap_size': 256 * 1024 * 1024,
+    # 每个连接的页缓存，负数表示 KiB
+    'cache_size': -64 * 1024,
+    # 遇到锁时最多等待多少毫秒，而不是立即报 "database is locked"
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
+}
+
+# 是否由 Blog/asgi.py 加载
+ASGI = os.environ.get('BLOGS_ASGI') == '1'
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # WSGI 下连接保留 10 分钟复用，取用前先检查连接是否还可用。
+        # ASGI 下不复用：同步代码在 sync_to_async 的线程里各开各的连接，
+        # 持久连接会随线程越积越多（Django 文档建议 ASGI 下关闭）
+        'CONN_MAX_AGE': 0 if ASGI else 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': sqlite.init_command(SQLITE_PRAGMAS),
+            # 事务一开始就拿写锁，避免读事务中途升级为写事务时直接失败
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
+# 只读副本：在 DATABASES 里加上副本的配置，再把别名写进这里，例如 ['replica']。
+# 为空时所有查询都走 default
+DATABASE_REPLICAS = []
+# 写操作之后多少秒内，该用户的列表页仍读主库
+REPLICA_PIN_SECONDS = 5
+DATABASE_ROUTERS = ['Blog.routers.PrimaryReplicaRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+
+# default：进程内缓存，放列表片段这类各进程各存一份也没关系的数据；
+# shared：所有工作进程共享，放文章版本号等必须全局一致的数据（见 Blog/caches.py）。
+# 文件缓存不需要额外的服务；有 Redis / Memcached 时把 shared 换成对应后端即可
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+    },
+}
+
+# 测试时共享缓存换到临时目录，不碰上面的 cache/
+TEST_RUNNER = 'Blog.test_runner.TestRunner'
+
+
+# Sessions
+# https://docs.djangoproject.com/en/6.0/topics/http/sessions/
+
+# 会话存储方式：
+# 'cached_db'：先读缓存，缓存里没有才读数据库，写入时两边都写。缓存必须是多个工作进程
+#     共享的（SESSION_CACHE_ALIAS），否则在一个进程里注销，别的进程缓存里的会话仍然有效；
+# 'signed_cookies'：会话签名后整个放在 cookie 里，完全不访问数据库，
+#     但内容不能太大，注销前签发的 cookie 在过期前也无法从服务端作废；
+# 'db'：Django 默认，每个请求都查 django_session 表
+SESSION_STRATEGY = os.environ.get('SESSION_STRATEGY', 'cached_db')
+SESSION_ENGINE = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}[SESSION_STRATEGY]
+SESSION_CACHE_ALIAS = 'shared'
+# 会话内容有变化才写回，只读页面不产生写操作
+SESSION_SAVE_EVERY_REQUEST = False
+# 提示消息放在 cookie 里，读取、清除消息都不用改写会话
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -102,6 +187,20 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# 密码哈希策略：'scrypt'、'argon2'（需要 argon2-cffi）或 Django 默认的 'pbkdf2'。
+# 旧算法的密码在用户下次登录时自动改用新算法，见 Blog/passwords.py
+PASSWORD_HASH_POLICY = os.environ.get('PASSWORD_HASH_POLICY', 'scrypt')
+PASSWORD_HASHERS = passwords.password_hashers(PASSWORD_HASH_POLICY)
+
+# 登录失败限制（users/throttle.py，计数在数据库里）：窗口期内同一用户名、同一 IP 最多失败多少次
+LOGIN_THROTTLE_ATTEMPTS = 5
+LOGIN_THROTTLE_IP_ATTEMPTS = 20
+LOGIN_THROTTLE_WINDOW = 300
+# 客户端 IP 从哪里取：None 表示直接用 REMOTE_ADDR。放在反向代理后面时改成代理写入的头，
+# 例如 'HTTP_X_FORWARDED_FOR'，TRUSTED_PROXIES 是前面有几层自己的代理
+LOGIN_THROTTLE_IP_HEADER = os.environ.get('LOGIN_THROTTLE_IP_HEADER') or None
+LOGIN_THROTTLE_TRUSTED_PROXIES = int(os.environ.get('LOGIN_THROTTLE_TRUSTED_PROXIES', 1))
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/6.0/topics/i18n/
@@ -121,6 +220,18 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/6.0/howto/static-files/
 
 STATIC_URL = 'static/'
+# collectstatic 的输出目录
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    # 开发时直接用原文件；上线后文件名带内容哈希，并预先生成 .gz / .br，见 Blog/storage.py
+    'staticfiles': {
+        'BACKEND': ('django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+                    else 'Blog.storage.CompressedManifestStaticFilesStorage'),
+    },
+}
 # 登录成功后默认跳转到主页
 LOGIN_REDIRECT_URL = 'blogs:index'
 # 注销重定向
@@ -128,5 +239,34 @@ LOGOUT_REDIRECT_URL = 'blogs:index'
 # 告诉 Django 登录页面的正确地址
 LOGIN_URL = 'users:login'
 
+# 响应压缩（Blog/compression.py）：小于 COMPRESS_MIN_SIZE 字节的响应不压缩，
+# 只压缩下面这些类型；装了 brotli 并且浏览器支持时优先用 br
+COMPRESS_MIN_SIZE = 500
+COMPRESS_CONTENT_TYPES = [
+    'text/html', 'text/css', 'text/plain', 'text/javascript', 'application/javascript',
+    'application/json', 'application/x-ndjson', 'image/svg+xml',
+]
+COMPRESS_BROTLI = True
+
+# 请求统计（Blog/metrics.py）：抽样比例，0 表示关闭；
+# 超过 METRICS_SLOW_REQUEST_MS 毫秒的请求连同 SQL 记到日志，None 表示不记
+METRICS_SAMPLE_RATE = 1.0
+METRICS_SLOW_REQUEST_MS = 500
+
+# 主页分页方式：'keyset' 游标分页（不 COUNT、不 OFFSET），'page' 传统页码分页
+BLOGS_PAGINATION = 'keyset'
+# 游标分页下文章总数的缓存秒数，设为 None 则不显示总数
+BLOGS_COUNT_TIMEOUT = 60
+# 是否使用 blogs.async_views 里的异步视图；Blog/asgi.py 会默认打开
+BLOGS_ASYNC_VIEWS = os.environ.get('BLOGS_ASYNC_VIEWS') == '1'
+# 文章列表片段缓存：使用哪个缓存、最长保留多少秒（文章变动时会立即失效）
+BLOGS_CACHE_ALIAS = 'default'
+# 文章版本号放在哪个缓存里，必须是多进程共享的
+BLOGS_GENERATION_CACHE_ALIAS = 'shared'
+BLOGS_FRAGMENT_TIMEOUT = 300
+# 列表页（主页、作者页、搜索）先发出导航栏和样式表链接，查完数据库再发文章列表，
+# 首字节更早到达，浏览器可以提前去取 CSS
+BLOGS_STREAM_LISTINGS = False
+
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 CRISPY_TEMPLATE_PACK = "bootstrap5"
\ No newline at end of file
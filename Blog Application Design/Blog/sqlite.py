@@ -0,0 +1,11 @@
+"""
+SQLite 连接调优。
+
+settings.py 里的 SQLITE_PRAGMAS 通过 init_command 在每个新连接上执行，
+配合 CONN_MAX_AGE 复用连接，这些 PRAGMA 每个连接只需要执行一次。
+"""
+
+
+def init_command(pragmas):
+    """把 {名称: 值} 转成 init_command 用的 PRAGMA 语句"""
+    return ' '.join(f'PRAGMA {name}={value};' for name, value in pragmas.items())
@@ -0,0 +1,43 @@
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # 没装 brotli 时只生成 .gz
+    brotli = None
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    collectstatic 时生成带内容哈希的文件名（base.3f2a9c1d7e4b.css），
+    再给文本类文件各写一份预压缩的 .gz / .br，由 Blog.assets.serve_static 按
+    Accept-Encoding 挑选，请求时不用再压缩。
+    """
+
+    compress_extensions = ('.css', '.js', '.svg', '.json', '.txt', '.html', '.xml')
+    # 太小的文件压缩后省不了几个字节
+    compress_min_size = 256
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in set(self.hashed_files.values()):
+            if name.endswith(self.compress_extensions):
+                self.compress(name)
+
+    def compress(self, name):
+        path = self.path(name)
+        with open(path, 'rb') as f:
+            data = f.read()
+        if len(data) < self.compress_min_size:
+            return
+        variants = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants['.br'] = brotli.compress(data)
+        for suffix, compressed in variants.items():
+            # 压缩后没明显变小就不写，serve_static 会直接发原文件
+            if len(compressed) < len(data) * 0.95:
+                with open(path + suffix, 'wb') as f:
+                    f.write(compressed)
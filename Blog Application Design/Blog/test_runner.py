@@ -0,0 +1,30 @@
+"""
+测试运行器：CACHES['shared'] 换到每次运行单独的临时目录。
+
+共享缓存默认是 BASE_DIR/cache，开发服务器也在用。测试直接读写它的话，
+版本号、登录失败计数、会话会在两次测试之间、测试和开发环境之间互相串，
+测试里的 clear() 还会清掉开发服务器的会话。
+"""
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.shared_cache_dir = tempfile.mkdtemp(prefix='blog-test-cache-')
+        self.shared_cache = override_settings(CACHES={
+            **settings.CACHES,
+            'shared': {**settings.CACHES['shared'], 'LOCATION': self.shared_cache_dir},
+        })
+        # 要在 build_suite 导入测试模块之前生效，测试里读到的 settings.CACHES 已经是临时目录
+        self.shared_cache.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.shared_cache.disable()
+        shutil.rmtree(self.shared_cache_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
@@ -14,11 +14,18 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
+
+from .assets import serve_static
+from .metrics import metrics
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    # DEBUG 时 runserver 自己处理静态文件，请求到不了这里
+    re_path(r'^%s(?P<path>.+)$' % settings.STATIC_URL.lstrip('/'), serve_static),
+    path('metrics/', metrics, name='metrics'),  # Prometheus 抓取地址，仅 staff
     path('users/', include('users.urls')), # 用户认证路由
     path('', include('blogs.urls')),       # 博客路由放最后
 ]
\ No newline at end of file
@@ -2,6 +2,36 @@ from django.contrib import admin
 
 # Register your models here.
 from django.contrib import admin
-from .models import BlogPost
+from django.contrib.auth.admin import UserAdmin
+from django.contrib.auth.models import User
 
-admin.site.register(BlogPost)
\ No newline at end of file
+from .models import AuthorStats, BlogPost
+
+admin.site.register(BlogPost)
+
+
+@admin.register(AuthorStats)
+class AuthorStatsAdmin(admin.ModelAdmin):
+    list_display = ['user', 'post_count', 'last_post_date']
+    list_select_related = ['user']
+    ordering = ['-post_count']
+    # 由信号和 reconcile_author_stats 维护，不在后台手改
+    readonly_fields = ['user', 'post_count', 'last_post_date']
+
+    def has_add_permission(self, request):
+        return False
+
+
+class UserWithStatsAdmin(UserAdmin):
+    """用户列表多一列文章数，联表读统计行，不做 COUNT"""
+    list_display = [*UserAdmin.list_display, 'post_count']
+    list_select_related = ['post_stats']
+
+    @admin.display(description='文章数', ordering='post_stats__post_count')
+    def post_count(self, user):
+        stats = getattr(user, 'post_stats', None)
+        return stats.post_count if stats else 0
+
+
+admin.site.unregister(User)
+admin.site.register(User, UserWithStatsAdmin)
\ No newline at end of file
@@ -0,0 +1,74 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_GET
+
+from Blog.routers import reads_from_replica
+
+from .models import BlogPost
+from .pagination import KeysetPaginator
+
+# 导出时每次从数据库取多少行，内存占用只和它有关，和表的大小无关
+EXPORT_CHUNK_SIZE = 2000
+
+
+def serialize_post(post):
+    """列表和详情共用的字段"""
+    return {
+        'id': post.id,
+        'title': post.title,
+        'excerpt': post.excerpt,
+        'owner': post.owner.username,
+        'date_added': post.date_added,
+    }
+
+
+@require_GET
+@reads_from_replica
+def post_list(request):
+    """文章列表，游标分页，每页 20 篇"""
+    page_obj = KeysetPaginator(BlogPost.objects.for_cards(), 20).get_page(request.GET.get('cursor'))
+
+    def page_url(cursor):
+        return request.build_absolute_uri(f'{request.path}?cursor={cursor}') if cursor else None
+
+    return JsonResponse({
+        'results': [serialize_post(post) for post in page_obj],
+        'next': page_url(page_obj.next_cursor),
+        'previous': page_url(page_obj.previous_cursor),
+    })
+
+
+@require_GET
+@reads_from_replica
+def post_detail(request, post_id):
+    """单篇文章，包含正文"""
+    post = get_object_or_404(BlogPost.objects.select_related('owner'), id=post_id)
+    data = serialize_post(post)
+    data['text'] = post.text
+    data['date_modified'] = post.date_modified
+    return JsonResponse(data)
+
+
+@require_GET
+@reads_from_replica
+def post_export(request):
+    """
+    导出全部文章为 NDJSON（每行一个 JSON 对象）。
+
+    用 StreamingHttpResponse 边查边发：iterator() 每次只取一批行，
+    values() 不构造模型实例，整张表再大内存占用也是恒定的。
+    """
+    rows = (BlogPost.objects.order_by('id')
+            .values('id', 'title', 'excerpt', 'text', 'owner__username', 'date_added', 'date_modified')
+            .iterator(chunk_size=EXPORT_CHUNK_SIZE))
+
+    def lines():
+        encoder = DjangoJSONEncoder(ensure_ascii=False)
+        for row in rows:
+            row['owner'] = row.pop('owner__username')
+            yield encoder.encode(row) + '\n'
+
+    response = StreamingHttpResponse(lines(), content_type='application/x-ndjson; charset=utf-8')
+    response['Content-Disposition'] = 'attachment; filename="posts.ndjson"'
+    return response
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class BlogsConfig(AppConfig):
     name = 'blogs'
+
+    def ready(self):
+        # 注册信号处理函数和系统检查
+        from . import checks, signals  # noqa: F401
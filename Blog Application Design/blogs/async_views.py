@@ -0,0 +1,133 @@
+"""
+主页和文章增删改视图的异步版本。
+
+在 ASGI 下（见 Blog/asgi.py）由 blogs/urls.py 换上这些视图，
+请求不用再经过 sync_to_async 线程桥：查询用 ORM 的异步接口，
+当前用户用 request.auser() 取出，login_required 也直接支持 async 视图。
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import aget_object_or_404, redirect, render
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+from django.views.decorators.http import require_POST
+
+from Blog.routers import reads_from_replica
+
+from .cache import aget_or_build_fragment, bump_posts_generation, get_or_build_fragment
+from .forms import BlogPostForm
+from .models import AuthorStats, BlogPost
+from .pagination import KeysetPaginator, aapproximate_count
+from .views import (index_etag, index_last_modified, index_page_fragment, index_page_key, listing_shell,
+                    render_post_list)
+
+
+async def resolve_user(request):
+    """
+    异步取出当前用户，并写回 request.user。
+    这样模板上下文、ETag 里再读 request.user 时就不会触发同步查库。
+    """
+    user = await request.auser()
+    request.user = user
+    return user
+
+
+@reads_from_replica
+async def index(request):
+    """主页：显示所有文章，带分页"""
+    await resolve_user(request)
+
+    # 条件请求：和同步版的 @condition 一样，命中时直接返回 304，不渲染模板
+    etag = quote_etag(index_etag(request))
+    last_modified = index_last_modified(request)
+    response = get_conditional_response(
+        request, etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+    if response is not None:
+        return response
+
+    keyset, page_key = index_page_key(request)
+
+    async def get_fragment():
+        if keyset:
+            async def build():
+                paginator = KeysetPaginator(BlogPost.objects.for_cards(), 6)
+                page_obj = await paginator.aget_page(page_key)
+                total_count = await aapproximate_count(BlogPost.objects.all(), 'blogs:post_count')
+                return render_post_list(page_obj, keyset, total_count)
+            return await aget_or_build_fragment('index', build, keyset, page_key)
+        # 传统页码分页的 Paginator 只有同步接口，这里仍走线程
+        return await sync_to_async(get_or_build_fragment)(
+            'index', index_page_fragment(page_key), keyset, page_key)
+
+    if getattr(settings, 'BLOGS_STREAM_LISTINGS', False):
+        # 和 views.render_listing 一样先发页面框架，这里用异步生成器
+        head, tail = listing_shell(request, {})
+
+        async def stream():
+            yield head
+            yield render_to_string('blogs/_post_list.html', await get_fragment(), request)
+            yield tail
+        response = StreamingHttpResponse(stream())
+    else:
+        response = render(request, 'blogs/index.html', await get_fragment())
+    if request.method in ('GET', 'HEAD'):
+        response.headers['ETag'] = etag
+        if last_modified:
+            response.headers['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
+
+
+@login_required
+async def new_post(request):
+    """添加新文章"""
+    user = await resolve_user(request)
+    if request.method != 'POST':
+        form = BlogPostForm()
+    else:
+        form = BlogPostForm(data=request.POST)
+        if form.is_valid():
+            new_post = form.save(commit=False)
+            new_post.owner = user
+            await new_post.asave()
+            return redirect('blogs:index')
+
+    context = {'form': form}
+    return render(request, 'blogs/new_post.html', context)
+
+
+@login_required
+async def edit_post(request, post_id):
+    """编辑文章"""
+    user = await resolve_user(request)
+    # 所有者写进查询条件：别人的文章查不到，直接 404
+    post = await aget_object_or_404(BlogPost, id=post_id, owner=user)
+
+    if request.method != 'POST':
+        form = BlogPostForm(instance=post)
+    else:
+        form = BlogPostForm(instance=post, data=request.POST)
+        if form.is_valid():
+            await form.instance.asave()
+            return redirect('blogs:index')
+
+    context = {'post': post, 'form': form}
+    return render(request, 'blogs/edit_post.html', context)
+
+
+@login_required
+@require_POST
+async def delete_post(request, post_id):
+    """删除文章，只接受 POST"""
+    user = await resolve_user(request)
+    deleted = await sync_to_async(BlogPost.objects.filter(id=post_id, owner=user).raw_delete)()
+    if not deleted:
+        raise Http404("你没有权限删除此文章。")
+
+    bump_posts_generation()
+    await sync_to_async(AuthorStats.objects.post_removed)(user.id)
+    return redirect('blogs:index')
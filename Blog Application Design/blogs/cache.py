@@ -0,0 +1,93 @@
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import caches
+
+from Blog.routers import current_read_alias
+
+# 全站文章的“版本号”，任何文章增删改都会让它变化，
+# 旧版本号下缓存的页面片段自然就不会再被读到
+GENERATION_KEY = 'blogs:posts_generation'
+# 版本号最后一次变化的时间（整数秒），主页的 Last-Modified 用它
+CHANGED_AT_KEY = 'blogs:posts_changed_at'
+
+
+def get_cache():
+    """存放列表片段的缓存，可以是进程内缓存"""
+    return caches[getattr(settings, 'BLOGS_CACHE_ALIAS', 'default')]
+
+
+def get_generation_cache():
+    """
+    存放版本号的缓存，必须是所有工作进程共享的（见 Blog/caches.py 的检查）：
+    这样一个进程里的改动会让每个进程里的片段都失效
+    """
+    return caches[getattr(settings, 'BLOGS_GENERATION_CACHE_ALIAS', 'shared')]
+
+
+def posts_generation():
+    """读取当前版本号，不存在时用当前时间初始化"""
+    cache = get_generation_cache()
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # 用时间而不是 1 做初值：版本号被淘汰后重建，也不会撞上旧片段的 key
+        cache.add(GENERATION_KEY, time.time_ns(), None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def bump_posts_generation():
+    """文章有变动时调用，让所有列表片段失效"""
+    cache = get_generation_cache()
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.add(GENERATION_KEY, time.time_ns(), None)
+    # Last-Modified 只精确到秒：同一秒内的两次改动也要让它前进，
+    # 所以取“下一秒”，并且至少比上一次大 1
+    previous = cache.get(CHANGED_AT_KEY) or 0
+    cache.set(CHANGED_AT_KEY, max(int(time.time()) + 1, previous + 1), None)
+
+
+def posts_changed_at():
+    """
+    文章最后一次增删改的时间，删除也算在内。
+    没有记录时（缓存被清空、刚部署）按现在算，宁可多返回一次 200 也不误返回 304
+    """
+    cache = get_generation_cache()
+    changed_at = cache.get(CHANGED_AT_KEY)
+    if changed_at is None:
+        cache.add(CHANGED_AT_KEY, int(time.time()), None)
+        changed_at = cache.get(CHANGED_AT_KEY)
+    return datetime.fromtimestamp(changed_at, tz=timezone.utc)
+
+
+def fragment_key(name, *key_parts):
+    # 带上数据库别名：从落后的副本查出来的片段不能给读主库的请求用
+    return ':'.join(['blogs', name, str(posts_generation()), current_read_alias(), *map(str, key_parts)])
+
+
+def get_or_build_fragment(name, build, *key_parts):
+    """
+    按“版本号 + 页面参数”缓存列表片段。
+    build 是缓存未命中时调用的函数，返回值需要能被 pickle。
+    """
+    timeout = getattr(settings, 'BLOGS_FRAGMENT_TIMEOUT', 300)
+    return get_cache().get_or_set(fragment_key(name, *key_parts), build, timeout)
+
+
+async def aget_or_build_fragment(name, abuild, *key_parts):
+    """
+    get_or_build_fragment 的异步版本，abuild 是协程函数。
+
+    本地内存 / 文件缓存的读写很快，直接同步调用，
+    只有未命中时查数据库的部分走异步 ORM。
+    """
+    cache = get_cache()
+    key = fragment_key(name, *key_parts)
+    fragment = cache.get(key)
+    if fragment is None:
+        fragment = await abuild()
+        cache.set(key, fragment, getattr(settings, 'BLOGS_FRAGMENT_TIMEOUT', 300))
+    return fragment
@@ -0,0 +1,8 @@
+from django.core.checks import register
+
+from Blog.caches import check_shared_alias
+
+
+@register()
+def generation_cache_is_shared(app_configs, **kwargs):
+    return check_shared_alias('BLOGS_GENERATION_CACHE_ALIAS', 'blogs.W00', '文章版本号')
@@ -0,0 +1,93 @@
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client, override_settings
+
+
+class Command(BaseCommand):
+    help = '对比 ASGI + 异步视图 和 WSGI + 同步视图 在不同并发连接数下的吞吐量（JSON 输出）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--handler', choices=['both', 'asgi', 'wsgi'], default='both',
+                            help='both 会分别启动两个子进程，各自加载对应的视图')
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 10, 50, 100],
+                            help='依次测试的并发连接数')
+        parser.add_argument('--requests', type=int, default=500, help='每个并发级别的总请求数')
+        parser.add_argument('--path', default='/', help='压测的地址')
+
+    def handle(self, *args, **options):
+        if options['handler'] == 'both':
+            results = {handler: self.run_child(handler, options) for handler in ('wsgi', 'asgi')}
+        else:
+            expected = options['handler'] == 'asgi'
+            if settings.BLOGS_ASYNC_VIEWS != expected:
+                raise CommandError(f"BLOGS_ASYNC_VIEWS 应为 {'1' if expected else '0'}")
+            run = self.run_asgi if expected else self.run_wsgi
+            # 两种测试客户端都固定用 testserver 作为 Host
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                results = {str(n): run(n, options) for n in options['concurrency']}
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def run_child(self, handler, options):
+        """在新进程里跑一种 handler，这样 URL 配置能按 BLOGS_ASYNC_VIEWS 重新加载"""
+        env = {**os.environ, 'BLOGS_ASYNC_VIEWS': '1' if handler == 'asgi' else '0'}
+        cmd = [sys.executable, 'manage.py', 'bench_async', '--handler', handler,
+               '--requests', str(options['requests']), '--path', options['path'],
+               '--concurrency', *map(str, options['concurrency'])]
+        result = subprocess.run(cmd, cwd=settings.BASE_DIR, env=env, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise CommandError(f'{handler} 压测失败：\n{result.stderr}')
+        return json.loads(result.stdout)
+
+    def run_wsgi(self, concurrency, options):
+        """WSGI：一个请求占一个线程，并发数就是线程数"""
+        def one(_):
+            client = Client()
+            start = time.perf_counter()
+            response = client.get(options['path'])
+            return time.perf_counter() - start, response.status_code
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            start = time.perf_counter()
+            samples = list(pool.map(one, range(options['requests'])))
+            wall = time.perf_counter() - start
+        return self.summarize(samples, wall)
+
+    def run_asgi(self, concurrency, options):
+        """ASGI：所有连接在同一个事件循环里，用信号量限制同时在途的请求数"""
+        async def main():
+            semaphore = asyncio.Semaphore(concurrency)
+            client = AsyncClient()
+
+            async def one():
+                async with semaphore:
+                    start = time.perf_counter()
+                    response = await client.get(options['path'])
+                    return time.perf_counter() - start, response.status_code
+
+            start = time.perf_counter()
+            samples = await asyncio.gather(*(one() for _ in range(options['requests'])))
+            return samples, time.perf_counter() - start
+
+        samples, wall = asyncio.run(main())
+        return self.summarize(samples, wall)
+
+    @staticmethod
+    def summarize(samples, wall):
+        errors = sum(1 for _, status in samples if status >= 400)
+        latencies = sorted(elapsed * 1000 for elapsed, _ in samples)
+        cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+        return {
+            'requests_per_sec': round(len(samples) / wall, 1),
+            'p50_ms': round(cuts[49], 3),
+            'p99_ms': round(cuts[98], 3),
+            'errors': errors,
+        }
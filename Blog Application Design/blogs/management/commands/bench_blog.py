@@ -0,0 +1,136 @@
+import json
+import statistics
+import time
+
+import django
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.urls import reverse
+
+from blogs.models import BlogPost
+from blogs.pagination import KeysetPaginator
+
+FLOWS = ['index', 'paging', 'new_post', 'edit_post', 'login']
+
+
+class _Rollback(Exception):
+    """压测产生的文章、会话等数据全部回滚"""
+
+
+class QueryCounter:
+    """connection.execute_wrapper 用的计数器"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = '用 Django 测试客户端压测主要页面，输出延迟分位数、每请求查询数和吞吐量（JSON）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='每个场景的请求次数')
+        parser.add_argument('--flows', nargs='+', choices=FLOWS, default=FLOWS)
+        parser.add_argument('--paging-depth', type=int, default=50, help='paging 场景最多翻到第几页')
+        parser.add_argument('--host', default='localhost', help='请求使用的 Host，需要在 ALLOWED_HOSTS 里')
+        parser.add_argument('--output', help='结果写入文件，不指定则打印到标准输出')
+
+    def handle(self, *args, **options):
+        self.host = options['host']
+        results = {
+            'django': django.get_version(),
+            'posts': BlogPost.objects.count(),
+            'requests_per_flow': options['requests'],
+            'flows': {},
+        }
+        try:
+            with transaction.atomic():
+                self.user = User.objects.create_user('bench-blog-user', password='bench-password')
+                for flow in options['flows']:
+                    samples = getattr(self, f'flow_{flow}')(options)
+                    results['flows'][flow] = self.summarize(samples)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        report = json.dumps(results, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(report + '\n')
+        else:
+            self.stdout.write(report)
+
+    def client(self, login=False):
+        client = Client(SERVER_NAME=self.host)
+        if login:
+            client.force_login(self.user)
+        return client
+
+    def measure(self, requests):
+        """依次执行 (client, method, url, data) 请求，返回 [(耗时秒, 查询数)]"""
+        samples = []
+        for client, method, url, data in requests:
+            counter = QueryCounter()
+            with connection.execute_wrapper(counter):
+                start = time.perf_counter()
+                response = getattr(client, method)(url, data)
+                elapsed = time.perf_counter() - start
+            if response.status_code >= 400:
+                raise CommandError(f'{method.upper()} {url} 返回 {response.status_code}')
+            samples.append((elapsed, counter.count))
+        return samples
+
+    def flow_index(self, options):
+        client = self.client()
+        url = reverse('blogs:index')
+        return self.measure((client, 'get', url, None) for _ in range(options['requests']))
+
+    def flow_paging(self, options):
+        # 先沿游标走一遍，拿到各页的游标，再循环访问这些页
+        paginator = KeysetPaginator(BlogPost.objects.all(), 6)
+        cursors, page = [''], paginator.get_page(None)
+        while page.has_next() and len(cursors) < options['paging_depth']:
+            cursors.append(page.next_cursor)
+            page = paginator.get_page(page.next_cursor)
+        client = self.client()
+        url = reverse('blogs:index')
+        return self.measure((client, 'get', url, {'cursor': cursors[i % len(cursors)]})
+                            for i in range(options['requests']))
+
+    def flow_new_post(self, options):
+        client = self.client(login=True)
+        url = reverse('blogs:new_post')
+        return self.measure((client, 'post', url, {'title': f'压测 {i}', 'text': '压测内容 ' * 50})
+                            for i in range(options['requests']))
+
+    def flow_edit_post(self, options):
+        post = BlogPost.objects.create(owner=self.user, title='压测', text='压测内容')
+        client = self.client(login=True)
+        url = reverse('blogs:edit_post', args=[post.id])
+        return self.measure((client, 'post', url, {'title': f'压测 {i}', 'text': '修改内容 ' * 50})
+                            for i in range(options['requests']))
+
+    def flow_login(self, options):
+        url = reverse('users:login')
+        data = {'username': self.user.username, 'password': 'bench-password'}
+        return self.measure((self.client(), 'post', url, data) for _ in range(options['requests']))
+
+    @staticmethod
+    def summarize(samples):
+        latencies = sorted(elapsed * 1000 for elapsed, _ in samples)
+        # quantiles 至少需要两个样本
+        cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+        total = sum(latencies) / 1000
+        return {
+            'requests': len(samples),
+            'requests_per_sec': round(len(samples) / total, 1) if total else None,
+            'p50_ms': round(cuts[49], 3),
+            'p95_ms': round(cuts[94], 3),
+            'p99_ms': round(cuts[98], 3),
+            'queries_per_request': round(statistics.mean(count for _, count in samples), 2),
+        }
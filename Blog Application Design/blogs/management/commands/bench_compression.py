@@ -0,0 +1,77 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from Blog import compression
+from blogs.cache import bump_posts_generation
+from blogs.models import BlogPost
+
+
+class Command(BaseCommand):
+    help = '比较列表页在不同压缩方式、是否流式输出下的传输字节数、首字节时间和总耗时（JSON）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help='每个场景的请求次数')
+        parser.add_argument('--path', help='要请求的地址，默认是主页')
+        parser.add_argument('--warm', action='store_true',
+                            help='保留列表片段缓存；默认每次请求前让缓存失效，把查询和渲染也算进去')
+        parser.add_argument('--host', default='localhost', help='请求使用的 Host，需要在 ALLOWED_HOSTS 里')
+        parser.add_argument('--output', help='结果写入文件，不指定则打印到标准输出')
+
+    def handle(self, *args, **options):
+        url = options['path'] or reverse('blogs:index')
+        encodings = ['identity', 'gzip'] + (['br'] if compression.brotli is not None else [])
+        results = {'path': url, 'posts': BlogPost.objects.count(), 'warm': options['warm'], 'scenarios': {}}
+        client = Client(SERVER_NAME=options['host'])
+
+        for stream in (False, True):
+            with override_settings(BLOGS_STREAM_LISTINGS=stream):
+                for encoding in encodings:
+                    samples = [self.fetch(client, url, encoding, options['warm'])
+                               for _ in range(options['requests'])]
+                    name = f"{'stream' if stream else 'buffered'}+{encoding}"
+                    results['scenarios'][name] = self.summarize(samples)
+
+        report = json.dumps(results, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(report + '\n')
+        else:
+            self.stdout.write(report)
+
+    @staticmethod
+    def fetch(client, url, encoding, warm):
+        """返回 (首字节耗时, 总耗时, 传输字节数)，单位秒、字节"""
+        if not warm:
+            bump_posts_generation()
+        start = time.perf_counter()
+        response = client.get(url, headers={'Accept-Encoding': encoding})
+        if response.status_code != 200:
+            raise CommandError(f'GET {url} 返回 {response.status_code}')
+        if response.streaming:
+            # 异步视图的流式响应在同步客户端里只能一次读完（首字节时间就等于总耗时），
+            # 测异步视图请用 bench_async
+            chunks = iter(response)
+            first = next(chunks, b'')
+            ttfb = time.perf_counter() - start
+            body = first + b''.join(chunks)
+        else:
+            ttfb = time.perf_counter() - start
+            body = response.content
+        total = time.perf_counter() - start
+        if encoding != 'identity' and response.get('Content-Encoding') != encoding:
+            raise CommandError(f'期望 {encoding} 压缩，实际是 {response.get("Content-Encoding")}')
+        return ttfb, total, len(body)
+
+    @staticmethod
+    def summarize(samples):
+        return {
+            'requests': len(samples),
+            'ttfb_p50_ms': round(statistics.median(ttfb for ttfb, _, _ in samples) * 1000, 3),
+            'total_p50_ms': round(statistics.median(total for _, total, _ in samples) * 1000, 3),
+            'bytes': round(statistics.mean(size for _, _, size in samples)),
+        }
@@ -0,0 +1,85 @@
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Q
+
+from blogs.models import BlogPost, make_excerpt
+from blogs.search import FTSResults, fts_available
+
+WORDS = (
+    '数据库 索引 缓存 性能 优化 查询 分页 模板 视图 模型 迁移 中间件 部署 并发 '
+    '事务 日志 测试 接口 异步 线程 进程 内存 磁盘 网络 服务器 浏览器 用户 文章 评论 '
+    'django python sqlite cache index query page template view model async thread'
+).split()
+
+
+class _Rollback(Exception):
+    """跑完基准后回滚，数据库里不留测试数据"""
+
+
+class Command(BaseCommand):
+    help = '在不同数据量下对比 FTS5 全文检索和 icontains 的查询耗时（测试数据会回滚）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+                            help='依次测试的文章总数')
+        parser.add_argument('--terms', nargs='+', default=['数据库 索引', 'django', '并发事务'],
+                            help='搜索词，每个词至少三个字符才会走全文索引')
+        parser.add_argument('--repeat', type=int, default=5, help='每个搜索词重复次数，取中位数')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        if not fts_available():
+            raise CommandError('当前数据库不是 SQLite，没有 FTS5 索引可测。')
+        self.rng = random.Random(options['seed'])
+        self.stdout.write(f"{'文章数':>10} {'搜索词':<12} {'FTS5 ms':>10} {'icontains ms':>14} {'倍数':>8}")
+        try:
+            with transaction.atomic():
+                owner = User.objects.create_user('bench-search-user')
+                total = 0
+                for size in sorted(options['sizes']):
+                    self.fill(owner, size - total, options['batch_size'])
+                    total = size
+                    for term in options['terms']:
+                        self.report(size, term, options['repeat'])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def fill(self, owner, count, batch_size):
+        """补足文章数；插入时 FTS 触发器会同步建索引"""
+        while count > 0:
+            batch = []
+            for _ in range(min(batch_size, count)):
+                text = ' '.join(self.rng.choices(WORDS, k=self.rng.randint(20, 400)))
+                title = ' '.join(self.rng.choices(WORDS, k=4))
+                batch.append(BlogPost(owner=owner, title=title, text=text, excerpt=make_excerpt(text)))
+            BlogPost.objects.bulk_create(batch)
+            count -= len(batch)
+
+    def report(self, size, term, repeat):
+        condition = Q()
+        for word in term.split():
+            condition &= Q(title__icontains=word) | Q(text__icontains=word)
+        icontains = BlogPost.objects.for_cards().filter(condition).order_by('-date_added', '-id')
+
+        fts_ms = self.timeit(lambda: FTSResults(term), repeat)
+        like_ms = self.timeit(lambda: icontains, repeat)
+        self.stdout.write(f'{size:>10} {term:<12} {fts_ms:>10.2f} {like_ms:>14.2f} {like_ms / fts_ms:>7.1f}x')
+
+    @staticmethod
+    def timeit(make_results, repeat):
+        """和搜索页一样：数总数 + 取第一页，返回中位数耗时（毫秒）"""
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            page = Paginator(make_results(), 6).get_page(1)
+            list(page)
+            samples.append((time.perf_counter() - start) * 1000)
+        samples.sort()
+        return samples[len(samples) // 2]
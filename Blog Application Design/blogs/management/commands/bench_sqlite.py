@@ -0,0 +1,125 @@
+import json
+import os
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from Blog.sqlite import init_command
+
+SCHEMA = """
+CREATE TABLE post (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    text TEXT NOT NULL,
+    date_added REAL NOT NULL
+);
+CREATE INDEX post_date_idx ON post (date_added DESC, id DESC);
+"""
+
+
+class Command(BaseCommand):
+    help = '读写混合并发压测：对比 SQLite 默认配置和 SQLITE_PRAGMAS 调优后的吞吐量与锁错误数'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8, help='读线程数（模拟主页查询）')
+        parser.add_argument('--writers', type=int, default=4, help='写线程数（模拟发文 / 编辑）')
+        parser.add_argument('--seconds', type=float, default=5.0, help='每种配置压测多久')
+        parser.add_argument('--rows', type=int, default=10_000, help='预先插入的文章数')
+
+    def handle(self, *args, **options):
+        configs = {
+            # Django 默认：回滚日志、FULL 同步、DEFERRED 事务，锁等待 5 秒（sqlite3 默认 timeout）
+            'default': {'pragmas': '', 'begin': 'BEGIN'},
+            'tuned': {'pragmas': init_command(settings.SQLITE_PRAGMAS), 'begin': 'BEGIN IMMEDIATE'},
+        }
+        results = {}
+        with tempfile.TemporaryDirectory() as tmp:
+            for name, config in configs.items():
+                path = os.path.join(tmp, f'{name}.sqlite3')
+                self.prepare(path, options['rows'])
+                results[name] = self.run(path, config, options)
+        self.stdout.write(json.dumps(results, indent=2))
+
+    @staticmethod
+    def connect(path, config):
+        conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        if config['pragmas']:
+            conn.executescript(config['pragmas'])
+        return conn
+
+    def prepare(self, path, rows):
+        conn = sqlite3.connect(path)
+        conn.executescript(SCHEMA)
+        now = time.time()
+        conn.executemany('INSERT INTO post (title, text, date_added) VALUES (?, ?, ?)',
+                         ((f'标题 {i}', '正文 ' * 200, now - i) for i in range(rows)))
+        conn.commit()
+        conn.close()
+
+    def run(self, path, config, options):
+        deadline = time.perf_counter() + options['seconds']
+        stats = {'read': [], 'write': [], 'read_errors': 0, 'write_errors': 0}
+        lock = threading.Lock()
+
+        def reader():
+            conn = self.connect(path, config)
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    conn.execute('SELECT id, title, substr(text, 1, 100) FROM post '
+                                 'ORDER BY date_added DESC, id DESC LIMIT 6').fetchall()
+                except sqlite3.OperationalError:
+                    with lock:
+                        stats['read_errors'] += 1
+                    continue
+                with lock:
+                    stats['read'].append(time.perf_counter() - start)
+            conn.close()
+
+        def writer():
+            conn = self.connect(path, config)
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    # 和 new_post 一样：先读（表单校验、查用户），再写
+                    conn.execute(config['begin'])
+                    conn.execute('SELECT max(id) FROM post').fetchone()
+                    conn.execute('INSERT INTO post (title, text, date_added) VALUES (?, ?, ?)',
+                                 ('新文章', '正文 ' * 200, time.time()))
+                    conn.execute('COMMIT')
+                except sqlite3.OperationalError:
+                    if conn.in_transaction:
+                        conn.execute('ROLLBACK')
+                    with lock:
+                        stats['write_errors'] += 1
+                    continue
+                with lock:
+                    stats['write'].append(time.perf_counter() - start)
+            conn.close()
+
+        threads = ([threading.Thread(target=reader) for _ in range(options['readers'])]
+                   + [threading.Thread(target=writer) for _ in range(options['writers'])])
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        return {
+            'reads_per_sec': round(len(stats['read']) / options['seconds'], 1),
+            'writes_per_sec': round(len(stats['write']) / options['seconds'], 1),
+            'read_p99_ms': self.p99(stats['read']),
+            'write_p99_ms': self.p99(stats['write']),
+            'read_errors': stats['read_errors'],
+            'write_errors': stats['write_errors'],
+        }
+
+    @staticmethod
+    def p99(samples):
+        if len(samples) < 2:
+            return None
+        return round(statistics.quantiles(samples, n=100)[98] * 1000, 3)
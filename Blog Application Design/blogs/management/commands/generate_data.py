@@ -0,0 +1,65 @@
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blogs.cache import bump_posts_generation
+from blogs.models import AuthorStats, BlogPost, make_excerpt
+
+# 生成正文用的词表，中英混排更接近真实文章
+WORDS = (
+    '今天 我们 一个 这个 学习 项目 数据 问题 方法 时间 可以 因为 所以 但是 已经 需要 '
+    '觉得 发现 开始 完成 代码 程序 博客 文章 生活 工作 周末 天气 电影 音乐 读书 旅行 '
+    'Python Django SQLite web cache index query test deploy server'
+).split()
+
+
+class Command(BaseCommand):
+    help = '生成测试用户和文章，正文长度服从对数正态分布（大部分短文，少量长文）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100, help='生成的用户数')
+        parser.add_argument('--posts', type=int, default=10_000, help='生成的文章数')
+        parser.add_argument('--password', default='bench-password',
+                            help='所有生成用户共用的密码，方便压测登录')
+        parser.add_argument('--prefix', default='bench', help='用户名前缀')
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=None, help='随机种子，固定后每次生成的数据相同')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        start = time.perf_counter()
+
+        # 密码哈希很慢，所有用户共用同一个哈希值
+        password = make_password(options['password'])
+        prefix = options['prefix']
+        existing = set(User.objects.filter(username__startswith=prefix).values_list('username', flat=True))
+        users = [User(username=f'{prefix}{i:06d}', password=password)
+                 for i in range(options['users']) if f'{prefix}{i:06d}' not in existing]
+        User.objects.bulk_create(users, batch_size=options['batch_size'])
+        owner_ids = list(User.objects.filter(username__startswith=prefix).values_list('id', flat=True))
+
+        remaining = options['posts']
+        while remaining > 0:
+            batch = [self.make_post(rng, rng.choice(owner_ids))
+                     for _ in range(min(options['batch_size'], remaining))]
+            with transaction.atomic():
+                BlogPost.objects.bulk_create(batch)
+            remaining -= len(batch)
+
+        bump_posts_generation()
+        AuthorStats.objects.rebuild(owner_ids, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"生成 {len(users)} 个用户、{options['posts']} 篇文章，"
+            f'用时 {time.perf_counter() - start:.2f} 秒'))
+
+    @staticmethod
+    def make_post(rng, owner_id):
+        # 中位数约 120 个词（几百字），长尾到几千词
+        n_words = min(int(rng.lognormvariate(4.8, 0.9)) + 5, 5000)
+        text = ' '.join(rng.choices(WORDS, k=n_words))
+        title = ''.join(rng.choices(WORDS, k=rng.randint(2, 6)))[:200]
+        return BlogPost(owner_id=owner_id, title=title, text=text, excerpt=make_excerpt(text))
@@ -0,0 +1,45 @@
+import base64
+import hashlib
+import re
+import urllib.request
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+# 固定版本的第三方静态文件：(保存路径, 下载地址, 官方公布的 SRI 摘要)
+BOOTSTRAP_VERSION = '5.3.3'
+CDN = f'https://cdn.jsdelivr.net/npm/bootstrap@{BOOTSTRAP_VERSION}/dist'
+ASSETS = [
+    ('bootstrap/bootstrap.min.css', f'{CDN}/css/bootstrap.min.css',
+     'sha384-QWTKZyjpPEjISv5WaRU9OFeRpok6YctnYmDr5pNlyT2bRjXh0JMhjY6hW+ALEwIH'),
+    ('bootstrap/bootstrap.bundle.min.js', f'{CDN}/js/bootstrap.bundle.min.js',
+     'sha384-YvpcrYf0tY3lHB60NNkmXc5s9fDVZLESaAA55NDzOxhy9GkcIdslK1eN7N6jIeHz'),
+]
+
+VENDOR_DIR = Path(__file__).resolve().parents[2] / 'static' / 'blogs' / 'vendor'
+
+# 没有一起下载 .map 文件，去掉指向它的注释，否则 collectstatic 生成哈希文件名时会找不到
+SOURCE_MAP = re.compile(rb'\n?/[*/]# sourceMappingURL=\S+?(?: \*/)?\s*$')
+
+
+def sri(data):
+    return 'sha384-' + base64.b64encode(hashlib.sha384(data).digest()).decode()
+
+
+class Command(BaseCommand):
+    help = '下载并校验 Bootstrap 等第三方静态文件到 blogs/static/blogs/vendor/，之后提交到仓库，部署时不再依赖 CDN'
+
+    def handle(self, *args, **options):
+        for path, url, integrity in ASSETS:
+            try:
+                with urllib.request.urlopen(url, timeout=30) as response:
+                    data = response.read()
+            except OSError as e:
+                raise CommandError(f'下载 {url} 失败：{e}')
+            if sri(data) != integrity:
+                raise CommandError(f'{url} 的摘要和预期不符，拒绝保存')
+
+            target = VENDOR_DIR / path
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(SOURCE_MAP.sub(b'\n', data))
+            self.stdout.write(f'{path}  {len(data)} 字节')
@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-18 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0002_alter_blogpost_date_added_alter_blogpost_text'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(fields=['-date_added', '-id'], name='blogpost_date_id_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 6.0 on 2026-10-18 10:30
+
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+
+def backfill_excerpt(apps, schema_editor):
+    """给已有文章补上摘要，分批更新避免一次读入整张表"""
+    BlogPost = apps.get_model('blogs', 'BlogPost')
+    batch = []
+    for post in BlogPost.objects.only('id', 'text').iterator(chunk_size=1000):
+        post.excerpt = Truncator(post.text).chars(100, truncate='…')
+        batch.append(post)
+        if len(batch) >= 1000:
+            BlogPost.objects.bulk_update(batch, ['excerpt'])
+            batch = []
+    if batch:
+        BlogPost.objects.bulk_update(batch, ['excerpt'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0003_blogpost_blogpost_date_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpost',
+            name='excerpt',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100, verbose_name='摘要'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_excerpt, migrations.RunPython.noop),
+    ]
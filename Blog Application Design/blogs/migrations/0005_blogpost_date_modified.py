@@ -0,0 +1,27 @@
+# Generated by Django 6.0 on 2026-10-18 11:00
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_date_modified(apps, schema_editor):
+    """已有文章没有修改记录，就当作发布后没改过"""
+    BlogPost = apps.get_model('blogs', 'BlogPost')
+    BlogPost.objects.update(date_modified=models.F('date_added'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0004_blogpost_excerpt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpost',
+            name='date_modified',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_date_modified, migrations.RunPython.noop),
+    ]
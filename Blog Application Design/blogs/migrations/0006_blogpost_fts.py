@@ -0,0 +1,70 @@
+# Generated by Django 6.0 on 2026-10-18 11:30
+
+from django.db import migrations
+
+# 外部内容 FTS5 表：索引 blogs_blogpost 的标题和正文，本身不再存一份原文。
+# trigram 分词按连续三个字符切分，中文没有空格也能按子串检索。
+# 注意：SQLite 上某些 AlterField 会重建 blogs_blogpost 表，触发器会随旧表一起删掉，
+# 以后有这类迁移时要把下面的触发器重新建一遍。
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE blogs_blogpost_fts USING fts5(
+        title, text,
+        content='blogs_blogpost', content_rowid='id',
+        tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER blogs_blogpost_fts_ai AFTER INSERT ON blogs_blogpost BEGIN
+        INSERT INTO blogs_blogpost_fts(rowid, title, text) VALUES (new.id, new.title, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER blogs_blogpost_fts_ad AFTER DELETE ON blogs_blogpost BEGIN
+        INSERT INTO blogs_blogpost_fts(blogs_blogpost_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER blogs_blogpost_fts_au AFTER UPDATE OF title, text ON blogs_blogpost BEGIN
+        INSERT INTO blogs_blogpost_fts(blogs_blogpost_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+        INSERT INTO blogs_blogpost_fts(rowid, title, text) VALUES (new.id, new.title, new.text);
+    END
+    """,
+    # 给已有文章建索引
+    "INSERT INTO blogs_blogpost_fts(blogs_blogpost_fts) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    'DROP TRIGGER IF EXISTS blogs_blogpost_fts_au',
+    'DROP TRIGGER IF EXISTS blogs_blogpost_fts_ad',
+    'DROP TRIGGER IF EXISTS blogs_blogpost_fts_ai',
+    'DROP TABLE IF EXISTS blogs_blogpost_fts',
+]
+
+
+def create_fts(apps, schema_editor):
+    # 只有 SQLite 有 FTS5，其他数据库上搜索会退回到 icontains
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in CREATE_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0005_blogpost_date_modified'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
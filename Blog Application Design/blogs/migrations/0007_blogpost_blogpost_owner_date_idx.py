@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0006_blogpost_fts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(fields=['owner', '-date_added', '-id'], name='blogpost_owner_date_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 6.0 on 2026-10-18 14:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_author_stats(apps, schema_editor):
+    """按已有文章统计一遍，只给发过文章的作者建行（其他人第一次发文时再建）"""
+    BlogPost = apps.get_model('blogs', 'BlogPost')
+    AuthorStats = apps.get_model('blogs', 'AuthorStats')
+    rows = (BlogPost.objects.values('owner')
+            .annotate(post_count=models.Count('id'), last_post_date=models.Max('date_added'))
+            .order_by())
+    batch = []
+    for row in rows.iterator(chunk_size=1000):
+        batch.append(AuthorStats(user_id=row['owner'], post_count=row['post_count'],
+                                 last_post_date=row['last_post_date']))
+        if len(batch) >= 1000:
+            AuthorStats.objects.bulk_create(batch)
+            batch = []
+    AuthorStats.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0007_blogpost_blogpost_owner_date_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='post_stats', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='作者')),
+                ('post_count', models.PositiveIntegerField(default=0, verbose_name='文章数')),
+                ('last_post_date', models.DateTimeField(blank=True, null=True, verbose_name='最近发布')),
+            ],
+            options={
+                'verbose_name': '作者统计',
+                'verbose_name_plural': '作者统计',
+            },
+        ),
+        migrations.RunPython(fill_author_stats, migrations.RunPython.noop),
+    ]
@@ -1,12 +1,145 @@
-from django.db import models
+from django.db import IntegrityError, models, router, transaction
+from django.db.models import Value
+from django.db.models.functions import Coalesce, Greatest
 from django.contrib.auth.models import User
+from django.utils.text import Truncator
+
+# 列表卡片上显示的摘要长度
+EXCERPT_LENGTH = 100
+
+
+def make_excerpt(text):
+    """从正文截出摘要，超长时以省略号结尾"""
+    return Truncator(text).chars(EXCERPT_LENGTH, truncate='…')
+
+
+class BlogPostQuerySet(models.QuerySet):
+    def for_cards(self):
+        """列表卡片需要的列：作者一起查出来，只读摘要不读正文"""
+        return self.select_related('owner').only('title', 'excerpt', 'date_added', 'owner__username')
+
+    def raw_delete(self):
+        """
+        直接执行一条 DELETE ... WHERE，返回删除的行数。
+
+        不经过 Collector：不先把行查出来，也不发 pre/post_delete 信号。
+        BlogPost 没有被别的表引用，不需要级联；全文索引由数据库触发器同步。
+        信号里做的事（刷新文章版本号）需要调用方自己做。
+        """
+        return self._raw_delete(router.db_for_write(self.model))
+
 
 class BlogPost(models.Model):
     title = models.CharField(max_length=200, verbose_name="标题")
     text = models.TextField(verbose_name="内容")
+    # 冗余存一份摘要，列表页只读这一列，不用读整篇正文
+    excerpt = models.CharField(max_length=EXCERPT_LENGTH, blank=True, editable=False, verbose_name="摘要")
     date_added = models.DateTimeField(auto_now_add=True)
+    # 最后修改时间，JSON 接口里输出
+    date_modified = models.DateTimeField(auto_now=True)
     # 关联到 User 模型，删除用户时级联删除其文章
     owner = models.ForeignKey(User, on_delete=models.CASCADE)
 
+    objects = BlogPostQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # 游标分页按 (date_added, id) 倒序读取
+            models.Index(fields=['-date_added', '-id'], name='blogpost_date_id_idx'),
+            # 作者文章列表：先按作者过滤，再沿同一顺序游标分页
+            models.Index(fields=['owner', '-date_added', '-id'], name='blogpost_owner_date_idx'),
+        ]
+
+    def __str__(self):
+        return self.title
+
+    def save(self, *args, **kwargs):
+        # 表单、后台保存时都会走这里，摘要始终跟着正文更新
+        self.excerpt = make_excerpt(self.text)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            # 只更新部分字段时，修改时间也要一起写；改了正文还要带上摘要
+            update_fields = {*update_fields, 'date_modified'}
+            if 'text' in update_fields:
+                update_fields.add('excerpt')
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+
+
+class AuthorStatsManager(models.Manager):
+    def post_added(self, owner_id, date_added):
+        """新文章：文章数原子地加一，最近发布时间取较大的那个"""
+        updated = self.filter(user_id=owner_id).update(
+            post_count=models.F('post_count') + 1,
+            last_post_date=Greatest(Coalesce('last_post_date', Value(date_added)), Value(date_added)),
+        )
+        if not updated:
+            # 还没有统计行：并发时可能被别的请求抢先建好，那就回去再更新一次
+            try:
+                with transaction.atomic():
+                    self.create(user_id=owner_id, post_count=1, last_post_date=date_added)
+            except IntegrityError:
+                self.post_added(owner_id, date_added)
+
+    def post_removed(self, owner_id, count=1):
+        """删了文章：文章数减去 count，最近发布时间从剩下的文章里重新取（走 owner/date 索引）"""
+        latest = BlogPost.objects.filter(owner_id=owner_id).order_by('-date_added').values('date_added')[:1]
+        self.filter(user_id=owner_id).update(
+            post_count=Greatest(models.F('post_count') - count, Value(0)),
+            last_post_date=models.Subquery(latest),
+        )
+
+    def rebuild(self, user_ids=None, batch_size=1000):
+        """
+        按文章表重新统计，返回处理的用户数。
+
+        user_ids 为 None 时重建全部用户。每批用户一次分组查询，
+        再用一条 INSERT ... ON CONFLICT DO UPDATE 写回，没有文章的用户记为 0。
+        """
+        users = User.objects.order_by('pk').values_list('pk', flat=True)
+        if user_ids is not None:
+            users = users.filter(pk__in=list(user_ids))
+        total = 0
+        last_pk = 0
+        while True:
+            batch = list(users.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                return total
+            stats = {
+                row['owner']: row
+                for row in BlogPost.objects.filter(owner__in=batch).values('owner')
+                .annotate(post_count=models.Count('id'), last_post_date=models.Max('date_added'))
+                .order_by()
+            }
+            self.bulk_create(
+                [AuthorStats(user_id=pk,
+                             post_count=stats.get(pk, {}).get('post_count', 0),
+                             last_post_date=stats.get(pk, {}).get('last_post_date'))
+                 for pk in batch],
+                update_conflicts=True, unique_fields=['user'], update_fields=['post_count', 'last_post_date'],
+            )
+            total += len(batch)
+            last_pk = batch[-1]
+
+
+class AuthorStats(models.Model):
+    """
+    每位作者的文章数和最近发布时间，冗余存一份，显示时只读这一行，不用现场 COUNT。
+
+    由 blogs/signals.py 在文章新建、删除时用 F() 原子更新；
+    bulk_create、raw_delete 这类不发信号的路径要自己调用 post_added / post_removed / rebuild，
+    数据对不上时可以运行 manage.py reconcile_author_stats 全量重建。
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True,
+                                related_name='post_stats', verbose_name="作者")
+    post_count = models.PositiveIntegerField(default=0, verbose_name="文章数")
+    last_post_date = models.DateTimeField(null=True, blank=True, verbose_name="最近发布")
+
+    objects = AuthorStatsManager()
+
+    class Meta:
+        verbose_name = "作者统计"
+        verbose_name_plural = "作者统计"
+
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return f'{self.user_id}: {self.post_count}'
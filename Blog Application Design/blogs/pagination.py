@@ -0,0 +1,156 @@
+import base64
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+
+def encode_cursor(post, direction):
+    """把 (date_added, id) 编码成对外不透明的游标字符串"""
+    return _encode(direction, post.date_added, post.pk)
+
+
+def _encode(direction, date_added, pk):
+    raw = f'{direction}|{date_added.isoformat()}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """解析游标，格式不对时返回 None（按第一页处理）"""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        direction, date_added, pk = raw.split('|')
+        if direction not in ('n', 'p'):
+            return None
+        date_added = datetime.fromisoformat(date_added)
+        if date_added.tzinfo is None:
+            return None
+        # 查询时会换算成 UTC，伪造的 0001-01-01T00:00:00+14:00 这类值在这里就会溢出
+        return direction, date_added.astimezone(timezone.utc), int(pk)
+    except (ValueError, UnicodeDecodeError, OverflowError):
+        return None
+
+
+def normalize_cursor(token):
+    """
+    把游标规范成唯一的写法，格式不对时返回 ''（第一页）。
+    用作缓存 key 时，同一位置只对应一个 key，任意字符串也不会原样进入 key
+    """
+    cursor = decode_cursor(token)
+    return _encode(*cursor) if cursor else ''
+
+
+def normalize_page_number(value):
+    """传统分页的页码规范成正整数，不合法时为 1（和 Paginator.get_page 的处理一致）"""
+    try:
+        return max(int(value), 1)
+    except (TypeError, ValueError):
+        return 1
+
+
+class KeysetPage:
+    """游标分页的一页：只知道前后有没有数据，不知道总页数"""
+
+    def __init__(self, object_list, has_next, has_previous):
+        self.object_list = object_list
+        # 空页没有首尾文章可以编码成游标
+        self.next_cursor = encode_cursor(object_list[-1], 'n') if has_next and object_list else None
+        self.previous_cursor = encode_cursor(object_list[0], 'p') if has_previous and object_list else None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    基于 (date_added, id) 的游标分页。
+
+    和 Paginator 不同，它不做 COUNT(*)，也不用 OFFSET，
+    每一页都是从复合索引上的某个位置往后读 per_page + 1 行，
+    所以翻到多深耗时都一样。queryset 只需要过滤条件，排序由这里决定。
+    """
+
+    def __init__(self, queryset, per_page):
+        self.queryset = queryset
+        self.per_page = per_page
+
+    def get_page(self, token):
+        cursor = decode_cursor(token)
+        page = self._make_page(list(self._rows(cursor)), cursor)
+        # 游标之后（或之前）已经没有文章了，回到第一页
+        return page if page is not None else self.get_page(None)
+
+    async def aget_page(self, token):
+        """get_page 的异步版本，供 async 视图使用"""
+        cursor = decode_cursor(token)
+        page = self._make_page([row async for row in self._rows(cursor)], cursor)
+        return page if page is not None else await self.aget_page(None)
+
+    def _rows(self, cursor):
+        """游标位置之后的 per_page + 1 行（多读一行用来判断还有没有下一页）"""
+        if cursor is None:
+            return self.queryset.order_by('-date_added', '-id')[:self.per_page + 1]
+
+        direction, date_added, pk = cursor
+        if direction == 'n':
+            # 往后翻：比游标更旧的文章。
+            # 外层的 date_added <= 是冗余条件，有了它 SQLite 才会直接定位到索引中间，
+            # 否则只会从头扫索引再逐行判断 OR，越往后翻越慢
+            after = Q(date_added__lte=date_added) & (
+                Q(date_added__lt=date_added) | Q(date_added=date_added, id__lt=pk))
+            return self.queryset.filter(after).order_by('-date_added', '-id')[:self.per_page + 1]
+
+        # 往前翻：反向读比游标更新的文章，_make_page 里再倒过来
+        before = Q(date_added__gte=date_added) & (
+            Q(date_added__gt=date_added) | Q(date_added=date_added, id__gt=pk))
+        return self.queryset.filter(before).order_by('date_added', 'id')[:self.per_page + 1]
+
+    def _make_page(self, rows, cursor):
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if cursor is None:
+            return KeysetPage(rows, has_more, False)
+        if not rows:
+            # 游标那一侧已经没有文章了（比如后面的文章被删光，或者伪造的游标）
+            return None
+        if cursor[0] == 'n':
+            return KeysetPage(rows, has_more, True)
+        return KeysetPage(rows[::-1], True, has_more)
+
+
+def approximate_count(queryset, cache_key):
+    """
+    总数只作展示用，放进缓存里，过期前不会再 COUNT(*)。
+    BLOGS_COUNT_TIMEOUT 为 None 时不显示总数。
+    """
+    timeout = getattr(settings, 'BLOGS_COUNT_TIMEOUT', 60)
+    if timeout is None:
+        return None
+    return cache.get_or_set(cache_key, queryset.count, timeout)
+
+
+async def aapproximate_count(queryset, cache_key):
+    """approximate_count 的异步版本"""
+    timeout = getattr(settings, 'BLOGS_COUNT_TIMEOUT', 60)
+    if timeout is None:
+        return None
+    count = cache.get(cache_key)
+    if count is None:
+        count = await queryset.acount()
+        cache.set(cache_key, count, timeout)
+    return count
@@ -0,0 +1,90 @@
+from django.db import connections, router
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import BlogPost
+
+FTS_TABLE = 'blogs_blogpost_fts'
+
+# trigram 分词下，少于三个字符的词没法走全文索引
+MIN_TERM_LENGTH = 3
+
+# snippet() 用不会出现在正文里的控制字符标记命中位置，转义之后再换成 <mark>
+HIT_START, HIT_END = '\x02', '\x03'
+
+
+def read_connection():
+    """FTS 查询是原生 SQL，不经过 ORM 的路由，这里手动按 BlogPost 的读库取连接"""
+    return connections[router.db_for_read(BlogPost)]
+
+
+def fts_available():
+    return read_connection().vendor == 'sqlite'
+
+
+def build_match_query(query):
+    """把用户输入拆成词，每个词加引号当作短语，词之间是 AND 关系"""
+    terms = query.split()
+    return ' '.join('"{}"'.format(term.replace('"', '""')) for term in terms)
+
+
+def highlight(snippet):
+    """转义 FTS 返回的片段，再把命中标记换成 <mark>"""
+    html = escape(snippet).replace(HIT_START, '<mark>').replace(HIT_END, '</mark>')
+    return mark_safe(html)
+
+
+class FTSResults:
+    """
+    FTS5 检索结果，按 bm25 相关度排序。
+
+    实现了 count() 和切片，可以直接交给 Paginator：
+    翻页时只查当前这一页的 rowid 和高亮片段，再一次性取出对应的文章。
+    """
+
+    # bm25 的列权重：标题命中比正文命中更相关
+    RANK = f'bm25({FTS_TABLE}, 10.0, 1.0)'
+
+    def __init__(self, query):
+        self.match = build_match_query(query)
+
+    def count(self):
+        with read_connection().cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [self.match])
+            return cursor.fetchone()[0]
+
+    def __getitem__(self, page):
+        start, stop = page.start or 0, page.stop
+        with read_connection().cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid, snippet({FTS_TABLE}, -1, %s, %s, '…', 24) FROM {FTS_TABLE} "
+                f'WHERE {FTS_TABLE} MATCH %s ORDER BY {self.RANK} LIMIT %s OFFSET %s',
+                [HIT_START, HIT_END, self.match, stop - start, start],
+            )
+            hits = cursor.fetchall()
+        posts = BlogPost.objects.for_cards().in_bulk([rowid for rowid, _ in hits])
+        results = []
+        for rowid, snippet in hits:
+            post = posts.get(rowid)
+            if post is not None:
+                post.snippet = highlight(snippet)
+                results.append(post)
+        return results
+
+
+def search_posts(query):
+    """
+    返回可分页的搜索结果。
+
+    能用 FTS5 时走全文索引；不是 SQLite，或者有词短于三个字符时，
+    退回到 icontains（会扫全表），结果按发布时间排序。
+    """
+    terms = query.split()
+    if fts_available() and all(len(term) >= MIN_TERM_LENGTH for term in terms):
+        return FTSResults(query)
+
+    condition = Q()
+    for term in terms:
+        condition &= Q(title__icontains=term) | Q(text__icontains=term)
+    return BlogPost.objects.for_cards().filter(condition).order_by('-date_added', '-id')
@@ -0,0 +1,29 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import bump_posts_generation
+from .models import AuthorStats, BlogPost
+
+
+@receiver(post_save, sender=BlogPost)
+@receiver(post_delete, sender=BlogPost)
+def invalidate_post_lists(sender, **kwargs):
+    """
+    新建、编辑、删除文章（包括后台操作）后，列表缓存全部作废。
+    要等事务提交后再换版本号：删除时 post_delete 是在事务里发出的，提前换的话，
+    并发的读请求可能用提交前的数据在新版本号下重建片段
+    """
+    transaction.on_commit(bump_posts_generation, using=kwargs.get('using'))
+
+
+@receiver(post_save, sender=BlogPost)
+def count_new_post(sender, instance, created, raw=False, **kwargs):
+    """新文章计入作者统计；loaddata（raw）导入的数据之后用 reconcile_author_stats 重建"""
+    if created and not raw:
+        AuthorStats.objects.post_added(instance.owner_id, instance.date_added)
+
+
+@receiver(post_delete, sender=BlogPost)
+def count_deleted_post(sender, instance, **kwargs):
+    AuthorStats.objects.post_removed(instance.owner_id)
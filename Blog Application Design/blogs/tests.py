@@ -1,3 +1,1108 @@
-from django.test import TestCase
+import base64
+import gzip
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import zlib
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import connection, connections, router
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path, reverse
+
+from Blog import compression
+from Blog.compression import choose_encoding
+from Blog.metrics import REGISTRY, Histogram
+from Blog.routers import PIN_COOKIE, reads_from_replica
+
+from .cache import GENERATION_KEY, posts_generation
+from .checks import generation_cache_is_shared
+from .models import AuthorStats, BlogPost
+from .pagination import KeysetPaginator, decode_cursor, encode_cursor, normalize_cursor, normalize_page_number
+
+
+def make_posts(owner, n, **kwargs):
+    """批量造文章，date_added 相同也没关系，游标会用 id 区分"""
+    return [BlogPost.objects.create(owner=owner, title=f'标题 {i}', text=f'内容 {i}', **kwargs)
+            for i in range(n)]
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('alice', password='pw-123456')
+        self.posts = make_posts(self.user, 14)
+        # 期望顺序：date_added 倒序，同一时间再按 id 倒序
+        self.expected = list(BlogPost.objects.order_by('-date_added', '-id'))
+
+    def test_walk_forward_and_back(self):
+        paginator = KeysetPaginator(BlogPost.objects.all(), 6)
+        first = paginator.get_page(None)
+        second = paginator.get_page(first.next_cursor)
+        third = paginator.get_page(second.next_cursor)
+        self.assertEqual(list(first) + list(second) + list(third), self.expected)
+        self.assertFalse(first.has_previous())
+        self.assertFalse(third.has_next())
+
+        back = paginator.get_page(third.previous_cursor)
+        self.assertEqual(list(back), list(second))
+        self.assertEqual(list(paginator.get_page(back.previous_cursor)), list(first))
+        self.assertFalse(paginator.get_page(back.previous_cursor).has_previous())
+
+    def test_deep_pages_seek_into_index(self):
+        paginator = KeysetPaginator(BlogPost.objects.all(), 6)
+        cursor = paginator.get_page(None).next_cursor
+        for token in (cursor, paginator.get_page(cursor).previous_cursor):
+            with CaptureQueriesContext(connection) as ctx:
+                paginator.get_page(token)
+            with connection.cursor() as c:
+                c.execute('EXPLAIN QUERY PLAN ' + ctx.captured_queries[-1]['sql'])
+                plan = ' '.join(str(row) for row in c.fetchall())
+            # 直接在索引上定位（SEARCH），而不是从头扫（SCAN）
+            self.assertIn('SEARCH blogs_blogpost USING INDEX blogpost_date_id_idx', plan)
+
+    def test_stale_cursor_past_last_page_falls_back_to_first_page(self):
+        paginator = KeysetPaginator(BlogPost.objects.all(), 6)
+        second = paginator.get_page(paginator.get_page(None).next_cursor)
+        # 最后一页的文章被删光，第二页的“下一页”游标指向空处
+        BlogPost.objects.filter(pk__in=[post.pk for post in self.expected[12:]]).delete()
+        page = paginator.get_page(second.next_cursor)
+        self.assertEqual(list(page), self.expected[:6])
+        self.assertFalse(page.has_previous())
+
+        response = self.client.get(reverse('blogs:index'), {'cursor': second.next_cursor})
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(reverse('blogs:author_posts', args=['alice']), {'cursor': second.next_cursor})
+        self.assertEqual(response.status_code, 200)
+
+    def test_bad_cursor_falls_back_to_first_page(self):
+        self.assertIsNone(decode_cursor('not-a-cursor'))
+        page = KeysetPaginator(BlogPost.objects.all(), 6).get_page('not-a-cursor')
+        self.assertEqual(list(page), self.expected[:6])
+
+        # 格式正确、换算成 UTC 时溢出的日期
+        forged = base64.urlsafe_b64encode(b'n|0001-01-01T00:00:00+14:00|1').decode()
+        self.assertIsNone(decode_cursor(forged))
+        for url in (reverse('blogs:index'), reverse('blogs:author_posts', args=['alice']),
+                    reverse('blogs:api_post_list')):
+            self.assertEqual(self.client.get(url, {'cursor': forged}).status_code, 200)
+
+    def test_index_renders_cursor_links(self):
+        response = self.client.get(reverse('blogs:index'))
+        self.assertContains(response, '?cursor=')
+        self.assertContains(response, '共约 14 篇文章')
+
+    @override_settings(BLOGS_COUNT_TIMEOUT=None)
+    def test_total_count_optional(self):
+        response = self.client.get(reverse('blogs:index'))
+        self.assertNotContains(response, '共约')
+
+    @override_settings(BLOGS_PAGINATION='page')
+    def test_page_mode_still_available(self):
+        response = self.client.get(reverse('blogs:index'), {'page': 2})
+        self.assertContains(response, '第 2 页 / 共 3 页')
+
+
+class IndexQueryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user('alice', password='pw-123456')
+        self.bob = User.objects.create_user('bob', password='pw-123456')
+
+    def index_queries(self):
+        """返回打开主页第一页时执行的 SQL"""
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse('blogs:index'))
+        return ctx.captured_queries
+
+    def test_query_count_does_not_grow_with_posts(self):
+        make_posts(self.alice, 1)
+        few = len(self.index_queries())
+        make_posts(self.alice, 3)
+        make_posts(self.bob, 3)
+        self.assertEqual(len(self.index_queries()), few)
+
+    def test_fixed_queries_per_page(self):
+        make_posts(self.alice, 4)
+        make_posts(self.bob, 4)
+        # 查文章（含作者）、缓存未命中时的总数；Last-Modified 来自缓存，不查库
+        with self.assertNumQueries(2):
+            self.client.get(reverse('blogs:index'))
+        # 整页片段已经缓存了，不再查库
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('blogs:index'))
+        self.assertContains(response, 'bob')
+
+    def test_full_text_not_loaded(self):
+        BlogPost.objects.create(owner=self.alice, title='长文', text='长' * 5000)
+        sql = [q['sql'] for q in self.index_queries() if 'ORDER BY' in q['sql']][0]
+        self.assertNotIn('"blogs_blogpost"."text"', sql)
+        self.assertIn('"blogs_blogpost"."excerpt"', sql)
+        response = self.client.get(reverse('blogs:index'))
+        self.assertContains(response, '长' * 99 + '…')
+
+
+class ExcerptTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', password='pw-123456')
+        self.client.force_login(self.user)
+
+    def test_new_post_fills_excerpt(self):
+        self.client.post(reverse('blogs:new_post'), {'title': 't', 'text': 'x' * 300})
+        post = BlogPost.objects.get()
+        self.assertEqual(post.excerpt, 'x' * 99 + '…')
+
+    def test_edit_post_refreshes_excerpt(self):
+        post = BlogPost.objects.create(owner=self.user, title='t', text='旧内容')
+        self.client.post(reverse('blogs:edit_post', args=[post.id]), {'title': 't', 'text': '新内容'})
+        post.refresh_from_db()
+        self.assertEqual(post.excerpt, '新内容')
+
+    def test_update_fields_includes_excerpt(self):
+        post = BlogPost.objects.create(owner=self.user, title='t', text='旧内容')
+        post.text = '新内容'
+        post.save(update_fields=['text'])
+        post.refresh_from_db()
+        self.assertEqual(post.excerpt, '新内容')
+
+
+class FragmentCacheMixin:
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user('alice', password='pw-123456')
+        self.bob = User.objects.create_user('bob', password='pw-123456')
+        self.post = BlogPost.objects.create(owner=self.alice, title='第一篇', text='内容')
+
+    def test_second_hit_is_served_from_cache(self):
+        self.client.get(reverse('blogs:index'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('blogs:index'))
+        self.assertContains(response, '第一篇')
+
+    def test_save_and_delete_invalidate(self):
+        self.client.get(reverse('blogs:index'))
+        # 版本号在事务提交后才变，测试里要手动执行 on_commit 回调
+        with self.captureOnCommitCallbacks(execute=True):
+            BlogPost.objects.create(owner=self.bob, title='第二篇', text='内容')
+        self.assertContains(self.client.get(reverse('blogs:index')), '第二篇')
+
+        self.post.title = '改过的标题'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.save()
+        self.assertContains(self.client.get(reverse('blogs:index')), '改过的标题')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.delete()
+        self.assertNotContains(self.client.get(reverse('blogs:index')), '改过的标题')
+
+    def test_owner_buttons_not_cached(self):
+        edit_url = reverse('blogs:edit_post', args=[self.post.id])
+        # 匿名访问先把片段写进缓存
+        self.assertNotContains(self.client.get(reverse('blogs:index')), edit_url)
+        self.client.force_login(self.bob)
+        self.assertNotContains(self.client.get(reverse('blogs:index')), edit_url)
+        self.client.force_login(self.alice)
+        self.assertContains(self.client.get(reverse('blogs:index')), edit_url)
+
+
+def caches_with_default(default):
+    """替换 default 缓存，保留共享缓存（文章版本号在那里）"""
+    return {'default': default, 'shared': settings.CACHES['shared']}
+
+
+@override_settings(CACHES=caches_with_default({'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}))
+class LocMemFragmentCacheTests(FragmentCacheMixin, TestCase):
+    pass
+
+
+class FileFragmentCacheTests(FragmentCacheMixin, TestCase):
+    def setUp(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        file_cache = override_settings(CACHES=caches_with_default({
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': cache_dir,
+        }))
+        file_cache.enable()
+        self.addCleanup(file_cache.disable)
+        super().setUp()
+
+
+class GenerationCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user('alice', password='pw-123456')
+
+    def test_generation_lives_in_shared_cache(self):
+        generation = posts_generation()
+        self.assertEqual(caches['shared'].get(GENERATION_KEY), generation)
+        self.assertIsNone(cache.get(GENERATION_KEY))
+
+    def test_bump_from_another_process_invalidates_local_fragments(self):
+        BlogPost.objects.create(owner=self.alice, title='第一篇', text='内容')
+        self.client.get(reverse('blogs:index'))
+        # 模拟另一个工作进程的改动：绕过本进程，直接改共享缓存里的版本号
+        BlogPost.objects.filter(title='第一篇').update(title='别的进程改的')
+        caches['shared'].incr(GENERATION_KEY)
+        self.assertContains(self.client.get(reverse('blogs:index')), '别的进程改的')
+
+    def test_tests_do_not_touch_dev_shared_cache(self):
+        # Blog.test_runner 把共享缓存换到了临时目录
+        self.assertNotEqual(str(settings.CACHES['shared']['LOCATION']), str(settings.BASE_DIR / 'cache'))
+
+    def test_generation_moves_after_commit(self):
+        post = BlogPost.objects.create(owner=self.alice, title='第一篇', text='内容')
+        generation = posts_generation()
+        with self.captureOnCommitCallbacks() as callbacks:
+            post.delete()
+        # 删除的事务提交之前版本号不变，并发的读请求不会把提交前的数据缓存到新版本号下
+        self.assertEqual(posts_generation(), generation)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(posts_generation(), generation)
+
+    def test_page_keys_are_normalised(self):
+        self.assertEqual(normalize_cursor('not-a-cursor'), '')
+        self.assertEqual(normalize_page_number('abc'), 1)
+        self.assertEqual(normalize_page_number('-3'), 1)
+        self.assertEqual(normalize_page_number('2'), 2)
+
+        post = BlogPost.objects.create(owner=self.alice, title='第一篇', text='内容')
+        token = encode_cursor(post, 'n')
+        self.assertEqual(normalize_cursor(token + '=='), token)
+
+        # 随便填的游标和第一页共用同一个片段
+        self.client.get(reverse('blogs:index'))
+        with self.assertNumQueries(0):
+            self.client.get(reverse('blogs:index'), {'cursor': 'x' * 500})
+
+    @override_settings(CACHES=caches_with_default(settings.CACHES['default']),
+                       BLOGS_GENERATION_CACHE_ALIAS='default')
+    def test_check_warns_about_process_local_generation_cache(self):
+        self.assertEqual([error.id for error in generation_cache_is_shared(None)], ['blogs.W002'])
+
+
+class BaseTemplateTests(TestCase):
+    def test_uses_local_assets(self):
+        response = self.client.get(reverse('blogs:index'))
+        self.assertNotContains(response, 'cdn.jsdelivr.net')
+        self.assertContains(response, settings.STATIC_URL + 'blogs/vendor/bootstrap/bootstrap.min.css')
+        self.assertContains(response, settings.STATIC_URL + 'blogs/vendor/bootstrap/bootstrap.bundle.min.js')
+        self.assertNotContains(response, '<style>')
+        self.assertContains(response, settings.STATIC_URL + 'blogs/css/site.css')
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user('alice', password='pw-123456')
+        self.post = BlogPost.objects.create(owner=self.alice, title='第一篇', text='内容')
+
+    def test_etag_returns_304_without_rendering(self):
+        response = self.client.get(reverse('blogs:index'))
+        etag = response['ETag']
+        with self.assertNumQueries(0), self.assertTemplateNotUsed('blogs/index.html'):
+            response = self.client.get(reverse('blogs:index'), headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_changes_with_posts_page_and_user(self):
+        etag = self.client.get(reverse('blogs:index'))['ETag']
+        cursor = encode_cursor(self.post, 'n')
+        self.assertNotEqual(self.client.get(reverse('blogs:index'), {'cursor': cursor})['ETag'], etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            BlogPost.objects.create(owner=self.alice, title='第二篇', text='内容')
+        response = self.client.get(reverse('blogs:index'), headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.delete()
+        response = self.client.get(reverse('blogs:index'), headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        self.client.force_login(self.alice)
+        response = self.client.get(reverse('blogs:index'), headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 200)
+
+    def test_last_modified_for_anonymous(self):
+        response = self.client.get(reverse('blogs:index'))
+        last_modified = response['Last-Modified']
+        response = self.client.get(reverse('blogs:index'), headers={'if-modified-since': last_modified})
+        self.assertEqual(response.status_code, 304)
+
+        self.client.force_login(self.alice)
+        self.assertNotIn('Last-Modified', self.client.get(reverse('blogs:index')))
+
+    def test_delete_moves_last_modified(self):
+        response = self.client.get(reverse('blogs:index'))
+        self.assertContains(response, '第一篇')
+        # 同一秒内删除也要生效
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.delete()
+        response = self.client.get(reverse('blogs:index'),
+                                   headers={'if-modified-since': response['Last-Modified']})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, '第一篇')
+
+    def test_edit_moves_date_modified(self):
+        before = self.post.date_modified
+        self.post.title = '新标题'
+        self.post.save(update_fields=['title'])
+        self.post.refresh_from_db()
+        self.assertGreater(self.post.date_modified, before)
+        self.assertEqual(self.post.date_added, BlogPost.objects.get().date_added)
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user('alice', password='pw-123456')
+        BlogPost.objects.create(owner=self.alice, title='Django 性能优化', text='介绍数据库索引和缓存。')
+        BlogPost.objects.create(owner=self.alice, title='周末随笔', text='今天学习了 Django 的缓存框架。')
+        BlogPost.objects.create(owner=self.alice, title='读书笔记', text='<i>数据库索引</i>')
+
+    def search(self, q, **params):
+        return self.client.get(reverse('blogs:search'), {'q': q, **params})
+
+    def test_title_hits_rank_first(self):
+        response = self.search('Django')
+        content = response.content.decode()
+        self.assertLess(content.index('Django 性能优化'), content.index('周末随笔'))
+        self.assertNotContains(response, '读书笔记')
+
+    def test_snippet_is_highlighted_and_escaped(self):
+        response = self.search('数据库索引')
+        self.assertContains(response, '<mark>数据库索引</mark>')
+        self.assertNotContains(response, '<i>')
+        self.assertContains(response, '&lt;i&gt;<mark>')
+
+    def test_index_stays_in_sync(self):
+        post = BlogPost.objects.create(owner=self.alice, title='新文章', text='全文检索测试')
+        self.assertContains(self.search('全文检索'), '新文章')
+        post.text = '换了内容'
+        post.save()
+        self.assertNotContains(self.search('全文检索'), '新文章')
+        post.delete()
+        self.assertNotContains(self.search('换了内容'), '新文章')
+
+    def test_short_terms_fall_back_to_icontains(self):
+        self.assertContains(self.search('随笔'), '周末随笔')
+
+    def test_paginated(self):
+        for i in range(8):
+            BlogPost.objects.create(owner=self.alice, title=f'分页 {i}', text='分页测试内容')
+        response = self.search('分页测试')
+        self.assertContains(response, 'q=%E5%88%86%E9%A1%B5%E6%B5%8B%E8%AF%95&amp;page=2')
+        self.assertEqual(len(self.search('分页测试', page=2).context['cards']), 2)
+
+    def test_quotes_in_query_are_safe(self):
+        self.assertEqual(self.search('"Django').status_code, 200)
+
+
+class AuthorPostsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user('alice', password='pw-123456')
+        self.bob = User.objects.create_user('bob', password='pw-123456')
+        make_posts(self.alice, 8)
+        BlogPost.objects.create(owner=self.bob, title='bob 的文章', text='内容')
+
+    def test_lists_only_author_posts_with_cursor(self):
+        url = reverse('blogs:author_posts', args=['alice'])
+        first = self.client.get(url)
+        self.assertNotContains(first, 'bob 的文章')
+        self.assertEqual(len(first.context['cards']), 6)
+        self.assertContains(first, '?cursor=')
+
+        cursor = KeysetPaginator(BlogPost.objects.filter(owner=self.alice), 6).get_page(None).next_cursor
+        second = self.client.get(url, {'cursor': cursor})
+        self.assertEqual(len(second.context['cards']), 2)
+
+    def test_uses_owner_date_index(self):
+        qs = BlogPost.objects.for_cards().filter(owner=self.alice).order_by('-date_added', '-id')[:7]
+        sql, params = qs.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            plan = ' '.join(str(row) for row in cursor.fetchall())
+        self.assertIn('blogpost_owner_date_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_unknown_author_404(self):
+        response = self.client.get(reverse('blogs:author_posts', args=['nobody']))
+        self.assertEqual(response.status_code, 404)
+
+
+class ApiTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user('alice', password='pw-123456')
+        self.posts = make_posts(self.alice, 25)
+
+    def test_list_walks_cursor_pages(self):
+        response = self.client.get(reverse('blogs:api_post_list'))
+        data = response.json()
+        self.assertEqual(len(data['results']), 20)
+        self.assertEqual(data['results'][0]['owner'], 'alice')
+        self.assertNotIn('text', data['results'][0])
+        self.assertIsNone(data['previous'])
+
+        data = self.client.get(data['next']).json()
+        self.assertEqual(len(data['results']), 5)
+        self.assertIsNone(data['next'])
+
+    def test_detail(self):
+        post = self.posts[0]
+        data = self.client.get(reverse('blogs:api_post_detail', args=[post.id])).json()
+        self.assertEqual(data['text'], post.text)
+        self.assertEqual(self.client.get(reverse('blogs:api_post_detail', args=[999])).status_code, 404)
+
+    def test_export_streams_ndjson(self):
+        response = self.client.get(reverse('blogs:api_post_export'))
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 25)
+        first = json.loads(lines[0])
+        self.assertEqual(first['id'], self.posts[0].id)
+        self.assertEqual(first['owner'], 'alice')
+
+    def test_read_only(self):
+        self.assertEqual(self.client.post(reverse('blogs:api_post_list')).status_code, 405)
+
+
+class ImportPostsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user('alice', password='pw-123456')
+
+    def run_import(self, content, suffix, *args):
+        with tempfile.NamedTemporaryFile('w', suffix=suffix, delete=False, encoding='utf-8') as f:
+            f.write(content)
+        self.addCleanup(os.remove, f.name)
+        out, err = StringIO(), StringIO()
+        call_command('import_posts', f.name, *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_jsonl_in_batches(self):
+        rows = [json.dumps({'owner': 'alice', 'title': f't{i}', 'text': 'x' * 150}) for i in range(5)]
+        rows.append(json.dumps({'owner': 'nobody', 'title': 't', 'text': 'x'}))
+        rows.append(json.dumps({'owner': 'alice', 'title': '', 'text': 'x'}))
+        rows.append('not json')
+        rows.append(json.dumps({'owner': ['alice'], 'title': 't', 'text': 'x'}))
+        rows.append(json.dumps({'owner': {'name': 'alice'}, 'title': 't', 'text': 'x'}))
+        self.client.get(reverse('blogs:index'))
+        out, err = self.run_import('\n'.join(rows), '.jsonl', '--batch-size', '2')
+        self.assertIn('导入 5 篇，跳过 5 行', out)
+        self.assertIn("owner 应当是用户名，实际是 ['alice']", err)
+        self.assertIn('nobody', err)
+        self.assertEqual(BlogPost.objects.count(), 5)
+        self.assertEqual(BlogPost.objects.first().excerpt, 'x' * 99 + '…')
+        # 导入后列表缓存失效
+        self.assertContains(self.client.get(reverse('blogs:index')), 't4')
+
+    def test_csv(self):
+        out, _ = self.run_import('owner,title,text\nalice,标题,"逗号,换行\n正文"\n', '.csv')
+        self.assertIn('导入 1 篇', out)
+        self.assertEqual(BlogPost.objects.get().text, '逗号,换行\n正文')
+
+
+class BenchmarkCommandTests(TestCase):
+    def test_generate_data(self):
+        call_command('generate_data', users=3, posts=20, seed=1, stdout=StringIO())
+        self.assertEqual(User.objects.filter(username__startswith='bench').count(), 3)
+        self.assertEqual(BlogPost.objects.count(), 20)
+        self.assertTrue(all(post.excerpt for post in BlogPost.objects.all()))
+
+    def test_bench_blog_reports_json_and_rolls_back(self):
+        call_command('generate_data', users=2, posts=10, seed=1, stdout=StringIO())
+        out = StringIO()
+        call_command('bench_blog', requests=3, flows=['index', 'paging', 'new_post', 'edit_post'],
+                     host='testserver', stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual(set(report['flows']), {'index', 'paging', 'new_post', 'edit_post'})
+        for flow in report['flows'].values():
+            self.assertEqual(flow['requests'], 3)
+            self.assertIn('p99_ms', flow)
+        self.assertEqual(BlogPost.objects.count(), 10)
+
+
+def async_blog_patterns():
+    """把主页和增删改换成异步视图的 blogs 路由，相当于 BLOGS_ASYNC_VIEWS = True"""
+    from . import async_views, urls as blog_urls
+    swap = {name: getattr(async_views, name) for name in ('index', 'new_post', 'edit_post', 'delete_post')}
+    return [path(str(p.pattern), swap.get(p.name, p.callback), name=p.name) for p in blog_urls.urlpatterns]
+
+
+class AsyncURLConf:
+    urlpatterns = [
+        path('users/', include('users.urls')),
+        path('', include((async_blog_patterns(), 'blogs'))),
+    ]
+
+
+@override_settings(ROOT_URLCONF=AsyncURLConf)
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user('alice', password='pw-123456')
+        self.bob = User.objects.create_user('bob', password='pw-123456')
+        self.post = BlogPost.objects.create(owner=self.alice, title='第一篇', text='内容')
+
+    async def test_index_and_conditional_get(self):
+        response = await self.async_client.get(reverse('blogs:index'))
+        self.assertContains(response, '第一篇')
+        self.assertIn('Last-Modified', response)
+        response = await self.async_client.get(reverse('blogs:index'),
+                                               headers={'if-none-match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    @override_settings(BLOGS_STREAM_LISTINGS=True)
+    async def test_index_streaming(self):
+        response = await self.async_client.get(reverse('blogs:index'), headers={'Accept-Encoding': 'gzip'})
+        self.assertTrue(response.is_async)
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertIn('第一篇', gzip.decompress(body).decode())
+
+    async def test_index_owner_buttons(self):
+        await self.async_client.aforce_login(self.alice)
+        response = await self.async_client.get(reverse('blogs:index'))
+        self.assertContains(response, reverse('blogs:edit_post', args=[self.post.id]))
+        self.assertNotIn('Last-Modified', response)
+
+    async def test_metrics_count_queries_of_async_views(self):
+        # 异步视图的查询在 sync_to_async 的工作线程里执行，也要计入这个请求
+        REGISTRY.clear()
+        await self.async_client.get(reverse('blogs:index'))
+        text = REGISTRY.render()
+        self.assertIn('blog_db_queries_bucket{view="blogs:index",le="0"} 0', text)
+        self.assertIn('blog_db_queries_count{view="blogs:index"} 1', text)
+        db_time = next(line for line in text.splitlines()
+                       if line.startswith('blog_db_duration_seconds_sum{view="blogs:index"}'))
+        self.assertGreater(float(db_time.split()[-1]), 0)
+
+    async def test_login_required(self):
+        response = await self.async_client.get(reverse('blogs:new_post'))
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(reverse('users:login'), response['Location'])
+
+    async def test_new_edit_delete(self):
+        await self.async_client.aforce_login(self.alice)
+        response = await self.async_client.post(reverse('blogs:new_post'), {'title': '异步', 'text': '异步内容'})
+        self.assertRedirects(response, reverse('blogs:index'), fetch_redirect_response=False)
+        post = await BlogPost.objects.aget(title='异步')
+        self.assertEqual(post.owner_id, self.alice.id)
+
+        await self.async_client.post(reverse('blogs:edit_post', args=[post.id]), {'title': '改过', 'text': 'x'})
+        self.assertEqual((await BlogPost.objects.aget(id=post.id)).title, '改过')
+
+        await self.async_client.post(reverse('blogs:delete_post', args=[post.id]))
+        self.assertFalse(await BlogPost.objects.filter(id=post.id).aexists())
+
+    async def test_other_users_post_is_404(self):
+        await self.async_client.aforce_login(self.bob)
+        response = await self.async_client.get(reverse('blogs:edit_post', args=[self.post.id]))
+        self.assertEqual(response.status_code, 404)
+        response = await self.async_client.post(reverse('blogs:delete_post', args=[self.post.id]))
+        self.assertEqual(response.status_code, 404)
+
+
+class SQLiteTuningTests(TestCase):
+    def test_pragmas_applied_on_connection(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], settings.SQLITE_PRAGMAS['busy_timeout'])
+
+    def test_persistent_connections_only_under_wsgi(self):
+        code = ('import Blog.{}; from django.conf import settings; '
+                'print(settings.DATABASES["default"]["CONN_MAX_AGE"])')
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': 'Blog.settings'}
+        env.pop('BLOGS_ASGI', None)
+        for module, expected in (('wsgi', '600'), ('asgi', '0')):
+            result = subprocess.run([sys.executable, '-c', code.format(module)], env=env,
+                                    cwd=settings.BASE_DIR, capture_output=True, text=True, check=True)
+            self.assertEqual(result.stdout.strip(), expected)
+
+    def test_bench_sqlite_runs(self):
+        out = StringIO()
+        call_command('bench_sqlite', seconds=0.2, readers=1, writers=1, rows=10, stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual(report['tuned']['write_errors'], 0)
+        self.assertGreater(report['tuned']['reads_per_sec'], 0)
+
+
+class OwnershipTests(TestCase):
+    """编辑、删除时所有者条件在 SQL 里判断，不再先查出文章再比较"""
+
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user('alice', password='pw-123456')
+        self.bob = User.objects.create_user('bob', password='pw-123456')
+        self.post = BlogPost.objects.create(owner=self.alice, title='标题', text='内容')
+        self.client.force_login(self.alice)
+
+    def request(self, method, name, **kwargs):
+        url = reverse(name, args=[self.post.id])
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, **kwargs)
+        return response, [q['sql'] for q in queries.captured_queries]
+
+    def test_edit_own_post(self):
+        # 会话在缓存里（cached_db），只查用户和带 owner 条件的文章
+        response, queries = self.request('get', 'blogs:edit_post')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 2)
+        self.assertIn('"owner_id" = %s' % self.alice.id, queries[-1])
+
+    def test_edit_other_users_post_is_404(self):
+        self.client.force_login(self.bob)
+        response, queries = self.request('get', 'blogs:edit_post')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(len(queries), 2)
+
+    def test_delete_own_post_is_single_delete(self):
+        generation = posts_generation()
+        response, queries = self.request('post', 'blogs:delete_post')
+        self.assertRedirects(response, reverse('blogs:index'), fetch_redirect_response=False)
+        # 查用户之后直接一条 DELETE，没有先 SELECT，最后更新作者统计
+        self.assertEqual(len(queries), 3)
+        self.assertTrue(queries[1].startswith('DELETE'))
+        self.assertTrue(queries[2].startswith('UPDATE "blogs_authorstats"'))
+        self.assertFalse(BlogPost.objects.filter(id=self.post.id).exists())
+        self.assertNotEqual(posts_generation(), generation)
+
+    def test_delete_other_users_post_is_404(self):
+        self.client.force_login(self.bob)
+        response, queries = self.request('post', 'blogs:delete_post')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(len(queries), 2)
+        self.assertTrue(BlogPost.objects.filter(id=self.post.id).exists())
+
+    def test_delete_requires_post(self):
+        response, queries = self.request('get', 'blogs:delete_post')
+        self.assertEqual(response.status_code, 405)
+        self.assertTrue(BlogPost.objects.filter(id=self.post.id).exists())
+
+    def test_index_renders_delete_form(self):
+        response = self.client.get(reverse('blogs:index'))
+        self.assertContains(response, 'action="%s" method="post"' % reverse('blogs:delete_post', args=[self.post.id]))
+        self.assertContains(response, 'csrfmiddlewaretoken')
+
+
+class AuthorStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user('alice', password='pw-123456')
+        self.bob = User.objects.create_user('bob', password='pw-123456')
+
+    def stats(self, user):
+        return AuthorStats.objects.get(user=user)
+
+    def test_counts_follow_new_and_deleted_posts(self):
+        self.client.force_login(self.alice)
+        for i in range(3):
+            self.client.post(reverse('blogs:new_post'), {'title': f'标题 {i}', 'text': '内容'})
+        latest = BlogPost.objects.latest('date_added')
+        self.assertEqual(self.stats(self.alice).post_count, 3)
+        self.assertEqual(self.stats(self.alice).last_post_date, latest.date_added)
+
+        self.client.post(reverse('blogs:delete_post', args=[latest.id]))
+        stats = self.stats(self.alice)
+        self.assertEqual(stats.post_count, 2)
+        self.assertEqual(stats.last_post_date, BlogPost.objects.latest('date_added').date_added)
+
+    def test_model_delete_goes_through_signal(self):
+        posts = make_posts(self.bob, 2)
+        posts[0].delete()
+        self.assertEqual(self.stats(self.bob).post_count, 1)
+        posts[1].delete()
+        stats = self.stats(self.bob)
+        self.assertEqual((stats.post_count, stats.last_post_date), (0, None))
+
+    def test_reconcile_rebuilds_in_bulk(self):
+        make_posts(self.alice, 4)
+        AuthorStats.objects.update(post_count=99)
+        BlogPost.objects.bulk_create([BlogPost(owner=self.bob, title='t', text='x')])
+
+        out = StringIO()
+        call_command('reconcile_author_stats', batch_size=1, stdout=out)
+        self.assertEqual(self.stats(self.alice).post_count, 4)
+        self.assertEqual(self.stats(self.bob).post_count, 1)
+
+    def test_author_page_reads_stats_row(self):
+        make_posts(self.alice, 2)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('blogs:author_posts', args=['alice']))
+        self.assertContains(response, '共 2 篇')
+        self.assertFalse(any('COUNT(' in q['sql'] for q in queries.captured_queries))
+
+    def test_admin_user_list_shows_post_count(self):
+        make_posts(self.alice, 2)
+        admin = User.objects.create_superuser('root', password='pw-123456')
+        self.client.force_login(admin)
+        response = self.client.get(reverse('admin:auth_user_changelist'))
+        self.assertContains(response, 'field-post_count')
+        self.assertEqual(self.client.get(reverse('admin:blogs_authorstats_changelist')).status_code, 200)
+
+
+class StaticPipelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.static_root = tempfile.mkdtemp()
+        cls.settings = override_settings(STATIC_ROOT=cls.static_root, STORAGES={
+            **settings.STORAGES,
+            'staticfiles': {'BACKEND': 'Blog.storage.CompressedManifestStaticFilesStorage'},
+        })
+        cls.settings.enable()
+        call_command('collectstatic', interactive=False, verbosity=0)
+        with open(os.path.join(cls.static_root, 'staticfiles.json')) as f:
+            cls.manifest = json.load(f)['paths']
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings.disable()
+        shutil.rmtree(cls.static_root)
+        super().tearDownClass()
+
+    def test_hashed_and_compressed_variants(self):
+        hashed = self.manifest['admin/css/base.css']
+        self.assertRegex(hashed, r'base\.[0-9a-f]{12}\.css$')
+        self.assertTrue(os.path.exists(os.path.join(self.static_root, hashed + '.gz')))
+        # 站点样式表也被收集并带上了哈希（太小，不压缩）
+        self.assertIn('blogs/css/site.css', self.manifest)
+        # 本地的 Bootstrap 带上哈希并预先压缩
+        for name in ('blogs/vendor/bootstrap/bootstrap.min.css', 'blogs/vendor/bootstrap/bootstrap.bundle.min.js'):
+            self.assertTrue(os.path.exists(os.path.join(self.static_root, self.manifest[name] + '.gz')))
+
+    def test_serves_precompressed_file_with_far_future_cache(self):
+        url = settings.STATIC_URL + self.manifest['admin/css/base.css']
+        response = self.client.get(url, headers={'Accept-Encoding': 'gzip, deflate'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+        response = self.client.get(url)
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_pages_render_with_manifest_storage(self):
+        # 模板引用了没有收集到的静态文件时，manifest 存储会让页面直接 500
+        response = self.client.get(reverse('blogs:index'))
+        self.assertContains(response, settings.STATIC_URL + self.manifest['blogs/css/site.css'])
+        self.assertContains(response, settings.STATIC_URL + self.manifest['blogs/vendor/bootstrap/bootstrap.min.css'])
+
+    def test_unhashed_name_gets_short_cache(self):
+        response = self.client.get(settings.STATIC_URL + 'admin/css/base.css')
+        self.assertNotIn('immutable', response['Cache-Control'])
+
+    def test_path_traversal_is_404(self):
+        response = self.client.get(settings.STATIC_URL + '..%2F..%2Fmanage.py')
+        self.assertEqual(response.status_code, 404)
+
+
+class FakeBrotli:
+    """代替 brotli 模块（用 zlib 实现），没装 brotli 时也能测到选 br 的分支"""
+
+    class Compressor:
+        def __init__(self, quality):
+            self._compressor = zlib.compressobj()
+
+        def process(self, data):
+            return self._compressor.compress(data)
+
+        def flush(self):
+            return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+        def finish(self):
+            return self._compressor.flush()
+
+    @staticmethod
+    def compress(data, quality=11):
+        return zlib.compress(data)
+
+    @staticmethod
+    def decompress(data):
+        return zlib.decompress(data)
+
+
+class CompressionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('alice', password='pw-123456')
+        make_posts(self.user, 6)
+
+    def test_index_is_gzipped(self):
+        response = self.client.get(reverse('blogs:index'), headers={'Accept-Encoding': 'gzip, deflate'})
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertIn('标题 0', gzip.decompress(response.content).decode())
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+
+    def test_weak_etag_still_matches(self):
+        response = self.client.get(reverse('blogs:index'), headers={'Accept-Encoding': 'gzip'})
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        response = self.client.get(reverse('blogs:index'), headers={
+            'Accept-Encoding': 'gzip', 'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    def test_not_compressed_without_accept_encoding(self):
+        response = self.client.get(reverse('blogs:index'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_small_response_not_compressed(self):
+        post = BlogPost.objects.first()
+        response = self.client.get(reverse('blogs:api_post_detail', args=[post.id]),
+                                   headers={'Accept-Encoding': 'gzip'})
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    @override_settings(COMPRESS_CONTENT_TYPES=['application/json'])
+    def test_content_type_allowlist(self):
+        response = self.client.get(reverse('blogs:index'), headers={'Accept-Encoding': 'gzip'})
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_streaming_export_is_compressed(self):
+        response = self.client.get(reverse('blogs:api_post_export'), headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        lines = gzip.decompress(b''.join(response.streaming_content)).decode().splitlines()
+        self.assertEqual(len(lines), 6)
+
+    def test_streamed_gzip_is_padded(self):
+        lengths = set()
+        for _ in range(5):
+            response = self.client.get(reverse('blogs:api_post_export'), headers={'Accept-Encoding': 'gzip'})
+            body = b''.join(response.streaming_content)
+            # FLG.FNAME 置位：头里带着随机长度的文件名
+            self.assertTrue(body[3] & 0x08)
+            self.assertEqual(len(gzip.decompress(body).decode().splitlines()), 6)
+            lengths.add(len(body))
+        self.assertGreater(len(lengths), 1)
+
+    @mock.patch.object(compression, 'brotli', FakeBrotli)
+    def test_logged_in_pages_use_padded_gzip_instead_of_brotli(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('blogs:index'), headers={'Accept-Encoding': 'br, gzip'})
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertTrue(response.content[3] & 0x08)
+
+    @mock.patch.object(compression, 'brotli', FakeBrotli)
+    def test_csrf_token_pages_use_padded_gzip_instead_of_brotli(self):
+        response = self.client.get(reverse('users:login'), headers={'Accept-Encoding': 'br, gzip'})
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('csrfmiddlewaretoken', gzip.decompress(response.content).decode())
+        # 第二次访问时浏览器已经带着 CSRF cookie，页面里仍然有 token
+        response = self.client.get(reverse('users:login'), headers={'Accept-Encoding': 'br, gzip'})
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    @mock.patch.object(compression, 'brotli', FakeBrotli)
+    def test_anonymous_pages_without_secrets_use_brotli(self):
+        response = self.client.get(reverse('blogs:index'), headers={'Accept-Encoding': 'br, gzip'})
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertIn('标题 0', FakeBrotli.decompress(response.content).decode())
+
+    def test_choose_encoding(self):
+        self.assertEqual(choose_encoding('gzip, deflate'), 'gzip')
+        self.assertIsNone(choose_encoding('gzip;q=0, deflate'))
+        self.assertIsNone(choose_encoding(''))
+        expected = 'br' if compression.brotli is not None else 'gzip'
+        self.assertEqual(choose_encoding('gzip, br'), expected)
+        self.assertEqual(choose_encoding('gzip, br', allow_brotli=False), 'gzip')
+
+
+@override_settings(BLOGS_STREAM_LISTINGS=True)
+class StreamingListingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('alice', password='pw-123456')
+        make_posts(self.user, 3)
+
+    def test_shell_is_sent_before_posts(self):
+        response = self.client.get(reverse('blogs:index'))
+        self.assertTrue(response.streaming)
+        chunks = [chunk.decode() for chunk in response]
+        self.assertIn('navbar', chunks[0])
+        self.assertNotIn('标题 0', chunks[0])
+        page = ''.join(chunks)
+        self.assertIn('标题 0', page)
+        self.assertTrue(page.rstrip().endswith('</html>'))
+
+    def test_csrf_cookie_set_for_delete_forms(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('blogs:author_posts', args=['alice']))
+        page = b''.join(response.streaming_content).decode()
+        self.assertIn('csrfmiddlewaretoken', page)
+        self.assertIn(settings.CSRF_COOKIE_NAME, response.cookies)
+
+    def test_streamed_and_gzipped(self):
+        response = self.client.get(reverse('blogs:search'), {'q': '标题'}, headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('标题 1', gzip.decompress(b''.join(response.streaming_content)).decode())
+
+    def test_bench_compression_runs(self):
+        out = StringIO()
+        call_command('bench_compression', requests=2, host='testserver', stdout=out)
+        report = json.loads(out.getvalue())
+        scenarios = report['scenarios']
+        self.assertLess(scenarios['buffered+gzip']['bytes'], scenarios['buffered+identity']['bytes'])
+        self.assertIn('stream+gzip', scenarios)
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        REGISTRY.clear()
+        self.user = User.objects.create_user('alice', password='pw-123456')
+        self.staff = User.objects.create_user('admin', password='pw-123456', is_staff=True)
+        make_posts(self.user, 3)
+
+    def scrape(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.client.logout()
+        return response.content.decode()
+
+    def test_records_per_view_histograms(self):
+        self.client.get(reverse('blogs:index'))
+        self.client.get(reverse('blogs:index'))
+        text = self.scrape()
+        self.assertIn('# TYPE blog_request_duration_seconds histogram', text)
+        self.assertIn('blog_request_duration_seconds_count{view="blogs:index"} 2', text)
+        self.assertIn('blog_db_queries_bucket{view="blogs:index",le="+Inf"} 2', text)
+        for line in text.splitlines():
+            if line.startswith('blog_template_render_seconds_sum{view="blogs:index"}'):
+                self.assertGreater(float(line.split()[-1]), 0)
+                break
+        else:
+            self.fail('没有模板渲染耗时')
+
+    def test_query_count_matches(self):
+        post = BlogPost.objects.first()
+        self.client.get(reverse('blogs:api_post_detail', args=[post.id]))
+        # 只有一条 select_related 查询，落在 <= 1 的桶里，不在 <= 0 的桶里
+        text = self.scrape()
+        self.assertIn('blog_db_queries_bucket{view="blogs:api_post_detail",le="0"} 0', text)
+        self.assertIn('blog_db_queries_bucket{view="blogs:api_post_detail",le="1"} 1', text)
+
+    def test_staff_only(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+
+    @override_settings(METRICS_SAMPLE_RATE=0)
+    def test_sampling_off_records_nothing(self):
+        self.client.get(reverse('blogs:index'))
+        self.assertNotIn('blogs:index', REGISTRY.render())
+
+    @override_settings(METRICS_SLOW_REQUEST_MS=0)
+    def test_slow_request_logged_with_sql(self):
+        with self.assertLogs('Blog.metrics', 'WARNING') as logs:
+            self.client.get(reverse('blogs:index'))
+        self.assertIn('blogs:index', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram((1, 5))
+        for value in (0.5, 1, 3, 10):
+            histogram.observe(value)
+        self.assertEqual(histogram.cumulative(), [(1, 2), (5, 3), ('+Inf', 4)])
+        self.assertEqual(histogram.sum, 14.5)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('alice', password='pw-123456')
+
+    def routed(self, cookies=None):
+        """在 reads_from_replica 标记的视图里看 BlogPost / User 的读查询分别发往哪个库"""
+        seen = {}
+
+        @reads_from_replica
+        def view(request):
+            seen['posts'] = BlogPost.objects.all().db
+            seen['users'] = User.objects.all().db
+            seen['write'] = router.db_for_write(BlogPost)
+            return HttpResponse()
+
+        request = RequestFactory().get('/')
+        request.COOKIES.update(cookies or {})
+        view(request)
+        return seen
+
+    def test_listing_reads_go_to_replica(self):
+        self.assertEqual(self.routed(), {'posts': 'replica', 'users': 'default', 'write': 'default'})
+        # 视图之外仍然读主库
+        self.assertEqual(BlogPost.objects.all().db, 'default')
+
+    def test_pin_cookie_keeps_reads_on_primary(self):
+        self.assertEqual(self.routed({PIN_COOKIE: '1'})['posts'], 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas_configured(self):
+        self.assertEqual(self.routed()['posts'], 'default')
+
+    def test_write_sets_pin_cookie(self):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('blogs:new_post'), {'title': '新文章', 'text': '内容'})
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], settings.REPLICA_PIN_SECONDS)
+        # 带着 cookie 回到主页，读的是主库，能看到刚发的文章（测试里并没有 replica 这个库）
+        self.assertContains(self.client.get(reverse('blogs:index')), '新文章')
+
+    def test_reads_do_not_set_pin_cookie(self):
+        response = self.client.get(reverse('users:login'))
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+
+class ReplicaLagFragmentTests(TestCase):
+    """副本是另一个 SQLite 文件，主库的写入不会同步过去，模拟副本落后"""
+
+    @classmethod
+    def setUpClass(cls):
+        # replica 只在这个类里存在，测试运行器建库、做检查时还看不到它，
+        # 所以 databases 也在这里才加上
+        cls.replica_dir = tempfile.mkdtemp()
+        connections.settings['replica'] = {**connections.settings['default'],
+                                           'NAME': os.path.join(cls.replica_dir, 'replica.sqlite3')}
+        call_command('migrate', database='replica', verbosity=0)
+        cls.databases = {'default', 'replica'}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica'].close()
+        del connections['replica']
+        del connections.settings['replica']
+        shutil.rmtree(cls.replica_dir)
+
+    def setUp(self):
+        cache.clear()
+        caches['shared'].clear()
+        self.user = User.objects.create_user('alice', password='pw-123456')
+
+    @override_settings(DATABASE_REPLICAS=['replica'])
+    def test_pinned_reader_does_not_get_fragment_built_from_lagging_replica(self):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('blogs:new_post'), {'title': '刚发的文章', 'text': '内容'})
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.assertFalse(BlogPost.objects.using('replica').exists())
+
+        # 没有 pin 的读者先访问，用副本上的旧数据填了新版本号下的片段
+        other = self.client_class()
+        self.assertNotContains(other.get(reverse('blogs:index')), '刚发的文章')
+        # 刚写过的用户读主库，不能拿到上面那份片段
+        self.assertContains(self.client.get(reverse('blogs:index')), '刚发的文章')
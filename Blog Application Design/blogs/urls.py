@@ -1,14 +1,28 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import api, async_views, views
+
+# ASGI 部署时主页和文章增删改换成异步视图，WSGI 下仍用同步视图
+page_views = async_views if settings.BLOGS_ASYNC_VIEWS else views
 
 app_name = 'blogs'
 urlpatterns = [
     # 主页
-    path('', views.index, name='index'),
+    path('', page_views.index, name='index'),
+    # 作者文章列表
+    path('author/<str:username>/', views.author_posts, name='author_posts'),
+    # 搜索
+    path('search/', views.search, name='search'),
     # 新建文章
-    path('new_post/', views.new_post, name='new_post'),
+    path('new_post/', page_views.new_post, name='new_post'),
     # 编辑文章
-    path('edit_post/<int:post_id>/', views.edit_post, name='edit_post'),
+    path('edit_post/<int:post_id>/', page_views.edit_post, name='edit_post'),
     # 删除路由
-    path('delete_post/<int:post_id>/', views.delete_post, name='delete_post'),
+    path('delete_post/<int:post_id>/', page_views.delete_post, name='delete_post'),
+
+    # 只读 JSON 接口
+    path('api/posts/', api.post_list, name='api_post_list'),
+    path('api/posts/<int:post_id>/', api.post_detail, name='api_post_detail'),
+    # 全量导出（NDJSON，流式返回）
+    path('api/posts/export/', api.post_export, name='api_post_export'),
 ]
\ No newline at end of file
@@ -1,29 +1,181 @@
+import hashlib
+
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
+from django.template.loader import render_to_string
+from django.middleware.csrf import get_token
 from django.contrib.auth.decorators import login_required
-from django.http import Http404 # 用于抛出404错误
+from django.contrib.auth.models import User
+from django.http import Http404, StreamingHttpResponse # 用于抛出404错误
 from django.core.paginator import Paginator # 引入分页器
+from django.views.decorators.http import condition, require_POST # 条件请求：ETag / Last-Modified
+
+from Blog.routers import reads_from_replica
 
-from .models import BlogPost
+from .cache import bump_posts_generation, get_or_build_fragment, posts_changed_at, posts_generation
+from .models import AuthorStats, BlogPost
+from .pagination import KeysetPaginator, approximate_count, normalize_cursor, normalize_page_number
+from .search import search_posts
 from .forms import BlogPostForm
 
+def render_post_list(page_obj, keyset, total_count, query=''):
+    """
+    把一页文章渲染成可缓存的片段。
+
+    片段里只有所有人看到都一样的内容：卡片正文和分页条。
+    编辑/删除按钮因人而异，留给 index.html 根据 owner_id 现场判断。
+    """
+    cards = [
+        {
+            'id': post.id,
+            'owner_id': post.owner_id,
+            'html': render_to_string('blogs/_post_card.html', {'post': post}),
+        }
+        for post in page_obj
+    ]
+    nav = ''
+    if page_obj.has_other_pages():
+        nav = render_to_string('blogs/_pagination.html', {
+            'page_obj': page_obj,
+            'keyset': keyset,
+            'total_count': total_count,
+            'query': query,
+        })
+    return {'cards': cards, 'nav': nav}
+
+
+# 流式输出时文章列表在页面框架里的占位符
+STREAM_SLOT = '<!-- blogs:post-list -->'
+
+
+def listing_shell(request, context):
+    """
+    渲染去掉文章列表的页面框架，在占位符处切成前后两段。
+
+    流式响应发出第一块时响应头已经发出去了，CSRF cookie 要在这之前确定，
+    所以先调用 get_token()，后面列表里的删除表单再用同一个 token。
+    """
+    get_token(request)
+    shell = render_to_string('blogs/index.html', {**context, 'stream_slot': STREAM_SLOT}, request)
+    return shell.split(STREAM_SLOT)
+
+
+def render_listing(request, context, get_fragment):
+    """
+    渲染列表页，get_fragment() 返回 render_post_list 的结果。
+
+    BLOGS_STREAM_LISTINGS 打开时用 StreamingHttpResponse：先发页面框架，
+    再查询、渲染文章列表，最后发页尾。
+    """
+    if not getattr(settings, 'BLOGS_STREAM_LISTINGS', False):
+        return render(request, 'blogs/index.html', {**context, **get_fragment()})
+
+    head, tail = listing_shell(request, context)
+
+    def stream():
+        yield head
+        yield render_to_string('blogs/_post_list.html', {**context, **get_fragment()}, request)
+        yield tail
+    return StreamingHttpResponse(stream())
+
+
+def index_page_key(request):
+    """
+    当前请求对应的分页方式和页码/游标，同时用作缓存 key 的一部分，
+    所以先规范化：不合法的值都当作第一页
+    """
+    keyset = getattr(settings, 'BLOGS_PAGINATION', 'keyset') == 'keyset'
+    if keyset:
+        return keyset, normalize_cursor(request.GET.get('cursor'))
+    return keyset, normalize_page_number(request.GET.get('page'))
+
+
+def index_etag(request):
+    """
+    主页的 ETag：文章版本号 + 页码 + 当前用户。
+
+    页面上的导航栏、编辑按钮、注销表单里的 CSRF token 都和用户有关，
+    所以用户 id 和 CSRF cookie 也要算进去。不需要查文章表。
+    """
+    keyset, page_key = index_page_key(request)
+    raw = ':'.join(map(str, [
+        posts_generation(), keyset, page_key, request.user.pk,
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+    ]))
+    return hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+
+
+def index_last_modified(request):
+    """
+    主页的 Last-Modified：文章最后一次增删改的时间（见 blogs/cache.py），
+    和版本号一起更新，所以删除文章也会让它前进。
+
+    页面内容还和当前用户有关（导航栏、编辑按钮），而它只反映文章的变化，
+    所以只给匿名访问用；登录用户以 ETag 为准。
+    """
+    if request.user.is_authenticated:
+        return None
+    return posts_changed_at()
+
+
+def index_page_fragment(page_key):
+    """传统页码分页下，生成某一页片段的函数"""
+    def build():
+        # 每页显示 6 篇文章
+        paginator = Paginator(BlogPost.objects.for_cards().order_by('-date_added'), 6)
+        page_obj = paginator.get_page(page_key)
+        return render_post_list(page_obj, False, paginator.count)
+    return build
+
+
+@reads_from_replica
+@condition(etag_func=index_etag, last_modified_func=index_last_modified)
 def index(request):
     """主页：显示所有文章，带分页"""
-    posts_list = BlogPost.objects.order_by('-date_added')
+    keyset, page_key = index_page_key(request)
+    if keyset:
+        # 游标分页：不做 COUNT(*) 和 OFFSET，翻多深都一样快
+        def build():
+            # 作者和文章一次查出来；只读摘要列，不把整篇正文读进来
+            paginator = KeysetPaginator(BlogPost.objects.for_cards(), 6)
+            page_obj = paginator.get_page(page_key)
+            total_count = approximate_count(BlogPost.objects.all(), 'blogs:post_count')
+            return render_post_list(page_obj, keyset, total_count)
+    else:
+        build = index_page_fragment(page_key)
+
+    # 同一版本号下，同一页只查询、渲染一次
+    return render_listing(request, {}, lambda: get_or_build_fragment('index', build, keyset, page_key))
+
+@reads_from_replica
+def author_posts(request, username):
+    """某位作者的文章列表，和主页一样用游标分页"""
+    author = get_object_or_404(User, username=username)
+    cursor = normalize_cursor(request.GET.get('cursor'))
 
-    # 每页显示 6 篇文章
-    paginator = Paginator(posts_list, 6)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    def build():
+        # 走 (owner, date_added, id) 复合索引，文章再多也不用在内存里排序
+        paginator = KeysetPaginator(BlogPost.objects.for_cards().filter(owner=author), 6)
+        return render_post_list(paginator.get_page(cursor), True, None)
 
-    # 判断是否需要显示分页条
-    is_paginated = page_obj.has_other_pages()
+    # 文章数、最近发布时间直接读统计表的一行
+    stats = AuthorStats.objects.filter(user=author).first()
+    return render_listing(request, {'author': author, 'stats': stats},
+                          lambda: get_or_build_fragment('author', build, author.pk, cursor))
 
-    context = {
-        'posts': page_obj, # 注意这里传的是 page_obj 而不是 posts_list
-        'page_obj': page_obj,
-        'is_paginated': is_paginated
-    }
-    return render(request, 'blogs/index.html', context)
+@reads_from_replica
+def search(request):
+    """搜索文章：全文检索，按相关度排序，带分页"""
+    query = request.GET.get('q', '').strip()
+
+    def build():
+        if not query:
+            return {'cards': [], 'nav': ''}
+        paginator = Paginator(search_posts(query), 6)
+        page_obj = paginator.get_page(request.GET.get('page'))
+        return render_post_list(page_obj, False, paginator.count, query=query)
+
+    return render_listing(request, {'query': query}, build)
 
 @login_required
 def new_post(request):
@@ -46,12 +198,9 @@ def new_post(request):
 @login_required
 def edit_post(request, post_id):
     """编辑文章"""
-    post = get_object_or_404(BlogPost, id=post_id)
-
     # 19-5: 核心保护逻辑
-    # 检查当前用户是否是文章所有者
-    if post.owner != request.user:
-        raise Http404("你没有权限编辑此文章。")
+    # 所有者写进查询条件：别人的文章查不到，直接 404
+    post = get_object_or_404(BlogPost, id=post_id, owner=request.user)
 
     if request.method != 'POST':
         form = BlogPostForm(instance=post)
@@ -66,14 +215,14 @@ def edit_post(request, post_id):
 
 
 @login_required
+@require_POST
 def delete_post(request, post_id):
-    """删除文章"""
-    post = get_object_or_404(BlogPost, id=post_id)
-
-    # 权限检查：只能删自己的
-    if post.owner != request.user:
+    """删除文章，只接受 POST"""
+    # 权限检查：只能删自己的。一条带所有者条件的 DELETE，删不到就是没权限或不存在
+    if not BlogPost.objects.filter(id=post_id, owner=request.user).raw_delete():
         raise Http404("你没有权限删除此文章。")
 
-    # 执行删除
-    post.delete()
-    return redirect('blogs:index')
\ No newline at end of file
+    # raw_delete 不发信号，手动让列表缓存失效、更新作者统计
+    bump_posts_generation()
+    AuthorStats.objects.post_removed(request.user.id)
+    return redirect('blogs:index')
@@ -2,4 +2,9 @@ from django.apps import AppConfig
 
 
 class UsersConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        # 注册系统检查
+        from . import checks  # noqa: F401
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.checks import register
+
+from Blog.caches import check_shared_alias
+
+
+# 会话数据（或者它的副本）放在缓存里的会话后端
+CACHED_SESSION_ENGINES = (
+    'django.contrib.sessions.backends.cache',
+    'django.contrib.sessions.backends.cached_db',
+)
+
+
+@register()
+def session_cache_is_shared(app_configs, **kwargs):
+    if settings.SESSION_ENGINE not in CACHED_SESSION_ENGINES:
+        return []
+    return check_shared_alias('SESSION_CACHE_ALIAS', 'users.W01', '会话（包括注销）')
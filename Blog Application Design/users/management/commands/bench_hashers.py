@@ -0,0 +1,51 @@
+import json
+import time
+
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from Blog.passwords import PREFERRED, password_hashers
+
+
+class Command(BaseCommand):
+    help = '测量各密码哈希策略下单核每秒能校验多少次登录密码（JSON）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--policies', nargs='+', choices=list(PREFERRED), default=list(PREFERRED))
+        parser.add_argument('--checks', type=int, default=20, help='每种策略校验密码的次数')
+        parser.add_argument('--output', help='结果写入文件，不指定则打印到标准输出')
+
+    def handle(self, *args, **options):
+        results = {}
+        for policy in options['policies']:
+            try:
+                hashers = password_hashers(policy)
+            except ImproperlyConfigured as e:
+                results[policy] = {'skipped': str(e)}
+                continue
+            with override_settings(PASSWORD_HASHERS=hashers):
+                results[policy] = self.measure(options['checks'])
+
+        report = json.dumps(results, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(report + '\n')
+        else:
+            self.stdout.write(report)
+
+    @staticmethod
+    def measure(checks):
+        encoded = make_password('bench-password')
+        # 单线程串行执行，用进程 CPU 时间算出的就是每核吞吐
+        wall, cpu = time.perf_counter(), time.process_time()
+        for _ in range(checks):
+            if not check_password('bench-password', encoded):
+                raise AssertionError('密码校验失败')
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        return {
+            'algorithm': encoded.split('$', 1)[0],
+            'ms_per_check': round(wall / checks * 1000, 2),
+            'logins_per_sec_per_core': round(checks / cpu, 1) if cpu else None,
+        }
@@ -0,0 +1,38 @@
+import time
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = ('分批删除过期会话，每批一个短事务，批与批之间可以停顿，'
+            '清理时不会长时间占住 SQLite 的写锁。建议用 cron 每天运行一次')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='每批删除的会话数')
+        parser.add_argument('--pause', type=float, default=0.05, help='两批之间停顿的秒数，让出写锁')
+
+    def handle(self, *args, **options):
+        if settings.SESSION_ENGINE.endswith('signed_cookies'):
+            self.stdout.write('会话存在 cookie 里，数据库中没有需要清理的会话')
+            return
+
+        now = timezone.now()
+        deleted = 0
+        while True:
+            # 先取一批主键再按主键删除：每条 DELETE 只碰这一批行，走 expire_date 索引
+            keys = list(Session.objects.filter(expire_date__lt=now)
+                        .values_list('session_key', flat=True)[:options['batch_size']])
+            if not keys:
+                break
+            with transaction.atomic():
+                count, _ = Session.objects.filter(session_key__in=keys).delete()
+            deleted += count
+            if len(keys) < options['batch_size']:
+                break
+            time.sleep(options['pause'])
+
+        self.stdout.write(self.style.SUCCESS(f'删除过期会话 {deleted} 个'))
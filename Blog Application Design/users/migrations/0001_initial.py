@@ -0,0 +1,27 @@
+# Generated by Django 6.0 on 2026-10-18 16:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoginFailure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True, verbose_name='键')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='失败次数')),
+                ('expires', models.DateTimeField(db_index=True, verbose_name='窗口结束')),
+            ],
+            options={
+                'verbose_name': '登录失败计数',
+                'verbose_name_plural': '登录失败计数',
+            },
+        ),
+    ]
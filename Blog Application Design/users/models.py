@@ -1,3 +1,42 @@
-from django.db import models
+from datetime import timedelta
 
-# Create your models here.
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
+
+
+class LoginFailureManager(models.Manager):
+    def counts(self, keys):
+        """窗口期内各个 key 的失败次数，没有记录的 key 不出现在结果里"""
+        return dict(self.filter(key__in=keys, expires__gt=timezone.now()).values_list('key', 'count'))
+
+    def record(self, key, window):
+        """失败次数原子地加一（UPDATE ... SET count = count + 1）；窗口过期后从 1 重新开始"""
+        now = timezone.now()
+        if self.filter(key=key, expires__gt=now).update(count=models.F('count') + 1):
+            return
+        # 没有记录或已经过期：顺便删掉所有过期的记录，再开一个新窗口。
+        # 并发时可能被别的请求抢先建好，那就回去再加一次
+        try:
+            with transaction.atomic():
+                self.filter(expires__lte=now).delete()
+                self.create(key=key, count=1, expires=now + timedelta(seconds=window))
+        except IntegrityError:
+            self.record(key, window)
+
+
+class LoginFailure(models.Model):
+    """登录失败计数（见 users/throttle.py），所有工作进程共用数据库里的同一行"""
+    # 'user:<用户名摘要>' 或 'ip:<客户端 IP>'
+    key = models.CharField('键', max_length=64, unique=True)
+    count = models.PositiveIntegerField('失败次数', default=0)
+    # 计数窗口结束的时间，之后这一行作废
+    expires = models.DateTimeField('窗口结束', db_index=True)
+
+    objects = LoginFailureManager()
+
+    class Meta:
+        verbose_name = '登录失败计数'
+        verbose_name_plural = '登录失败计数'
+
+    def __str__(self):
+        return f'{self.key}: {self.count}'
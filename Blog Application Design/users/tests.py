@@ -1,3 +1,198 @@
-from django.test import TestCase
+import importlib.util
+import json
+from datetime import timedelta
+from io import StringIO
+from unittest import skipIf
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from Blog.passwords import PBKDF2, SCRYPT, password_hashers
+
+from .checks import session_cache_is_shared
+from .models import LoginFailure
+from .throttle import client_ip
+
+
+class PasswordPolicyTests(TestCase):
+    def test_preferred_hasher_first_and_old_ones_kept(self):
+        hashers = password_hashers('scrypt')
+        self.assertEqual(hashers[0], SCRYPT)
+        self.assertIn(PBKDF2, hashers)
+        self.assertEqual(len(hashers), len(set(hashers)))
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ImproperlyConfigured):
+            password_hashers('md5')
+
+    @skipIf(importlib.util.find_spec('argon2') is not None, '已安装 argon2-cffi')
+    def test_argon2_requires_library(self):
+        with self.assertRaises(ImproperlyConfigured):
+            password_hashers('argon2')
+
+    @override_settings(METRICS_SLOW_REQUEST_MS=None)  # PBKDF2 校验本身就慢，不要打慢请求日志
+    def test_rehash_on_login(self):
+        with override_settings(PASSWORD_HASHERS=password_hashers('pbkdf2')):
+            user = User.objects.create_user('alice', password='pw-123456')
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$'))
+
+        with override_settings(PASSWORD_HASHERS=password_hashers('scrypt')):
+            response = self.client.post(reverse('users:login'), {'username': 'alice', 'password': 'pw-123456'})
+        self.assertEqual(response.status_code, 302)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('scrypt$'))
+
+    def test_bench_hashers_runs(self):
+        out = StringIO()
+        call_command('bench_hashers', policies=['scrypt', 'argon2'], checks=1, stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual(report['scrypt']['algorithm'], 'scrypt')
+        self.assertGreater(report['scrypt']['logins_per_sec_per_core'], 0)
+        self.assertIn('argon2', report)
+
+
+@override_settings(LOGIN_THROTTLE_ATTEMPTS=3, LOGIN_THROTTLE_IP_ATTEMPTS=5)
+class LoginThrottleTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', password='pw-123456')
+
+    def login(self, password, username='alice', ip='10.0.0.1'):
+        return self.client.post(reverse('users:login'), {'username': username, 'password': password},
+                                REMOTE_ADDR=ip)
+
+    def test_blocked_after_failures_without_checking_password(self):
+        for _ in range(3):
+            self.assertEqual(self.login('wrong').status_code, 200)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.login('pw-123456')
+        self.assertEqual(response.status_code, 429)
+        self.assertContains(response, '登录失败次数过多', status_code=429)
+        # 没有去查用户，更没有计算密码哈希
+        self.assertFalse(any('auth_user' in q['sql'] for q in queries.captured_queries))
+
+    def test_success_resets_counter(self):
+        self.login('wrong')
+        self.login('wrong')
+        self.assertEqual(self.login('pw-123456').status_code, 302)
+        self.client.logout()
+        for _ in range(2):
+            self.login('wrong')
+        self.assertEqual(self.login('pw-123456').status_code, 302)
+
+    def test_ip_limit_across_usernames(self):
+        for i in range(5):
+            self.login('wrong', username=f'user{i}')
+        self.assertEqual(self.login('pw-123456').status_code, 429)
+        # 换个 IP 不受影响
+        self.assertEqual(self.login('pw-123456', ip='10.0.0.2').status_code, 302)
+
+    def test_counters_are_incremented_in_the_database(self):
+        self.login('wrong')
+        self.assertEqual(LoginFailure.objects.get(key='ip:10.0.0.1').count, 1)
+        with CaptureQueriesContext(connection) as queries:
+            self.login('wrong')
+        # 在数据库里原子地加一，而不是读出来再写回
+        updates = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE "users_loginfailure"')]
+        self.assertEqual(len(updates), 2)
+        self.assertTrue(all('"count" + 1' in sql for sql in updates))
+        self.assertEqual(LoginFailure.objects.get(key='ip:10.0.0.1').count, 2)
+
+    def test_expired_window_starts_over(self):
+        past = timezone.now() - timedelta(seconds=1)
+        LoginFailure.objects.create(key='ip:10.0.0.1', count=99, expires=past)
+        LoginFailure.objects.create(key='ip:10.9.9.9', count=99, expires=past)
+        self.assertEqual(self.login('pw-123456').status_code, 302)
+        self.client.logout()
+
+        self.login('wrong')
+        self.assertEqual(LoginFailure.objects.get(key='ip:10.0.0.1').count, 1)
+        # 其他过期记录顺便清掉
+        self.assertFalse(LoginFailure.objects.filter(key='ip:10.9.9.9').exists())
+
+    def test_client_ip_defaults_to_remote_addr(self):
+        request = RequestFactory().get('/', REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR='1.2.3.4')
+        self.assertEqual(client_ip(request), '10.0.0.1')
+
+    @override_settings(LOGIN_THROTTLE_IP_HEADER='HTTP_X_FORWARDED_FOR', LOGIN_THROTTLE_TRUSTED_PROXIES=1)
+    def test_client_ip_from_proxy_header(self):
+        factory = RequestFactory()
+        # 客户端自己伪造的最左边的地址不算，取代理追加的最后一个
+        request = factory.get('/', REMOTE_ADDR='127.0.0.1', HTTP_X_FORWARDED_FOR='6.6.6.6, 1.2.3.4')
+        self.assertEqual(client_ip(request), '1.2.3.4')
+        # 没有经过代理的请求回退到 REMOTE_ADDR
+        self.assertEqual(client_ip(factory.get('/', REMOTE_ADDR='10.0.0.1')), '10.0.0.1')
+        # 地址统一写法
+        request = factory.get('/', HTTP_X_FORWARDED_FOR='2001:DB8:0:0::1')
+        self.assertEqual(client_ip(request), '2001:db8::1')
+
+    @override_settings(LOGIN_THROTTLE_IP_HEADER='HTTP_X_FORWARDED_FOR', LOGIN_THROTTLE_TRUSTED_PROXIES=1)
+    def test_ip_limit_behind_proxy(self):
+        for i in range(5):
+            self.client.post(reverse('users:login'), {'username': f'user{i}', 'password': 'wrong'},
+                             REMOTE_ADDR='127.0.0.1', HTTP_X_FORWARDED_FOR=f'{i}.{i}.{i}.{i}, 1.2.3.4')
+        response = self.client.post(reverse('users:login'), {'username': 'alice', 'password': 'pw-123456'},
+                                    REMOTE_ADDR='127.0.0.1', HTTP_X_FORWARDED_FOR='1.2.3.4')
+        self.assertEqual(response.status_code, 429)
+
+
+class SessionTests(TestCase):
+    def setUp(self):
+        caches['shared'].clear()
+        self.user = User.objects.create_user('alice', password='pw-123456')
+        self.client.force_login(self.user)
+
+    def session_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('blogs:index'))
+        self.assertEqual(response.status_code, 200)
+        return [q['sql'] for q in queries.captured_queries if 'django_session' in q['sql']]
+
+    def test_read_only_page_does_not_touch_session_table(self):
+        # cached_db：会话从缓存读出，页面不修改会话，也就不会写回
+        self.assertEqual(self.session_queries(), [])
+        self.assertEqual(self.session_queries(), [])
+
+    def test_logout_is_seen_by_other_workers(self):
+        session_key = self.client.session.session_key
+        self.assertIsNotNone(caches['shared'].get('django.contrib.sessions.cached_db' + session_key))
+        self.client.logout()
+        # 会话缓存是共享的，注销后别的进程也读不到这个会话
+        self.assertIsNone(caches['shared'].get('django.contrib.sessions.cached_db' + session_key))
+
+    @override_settings(SESSION_CACHE_ALIAS='default')
+    def test_check_warns_about_process_local_session_cache(self):
+        self.assertEqual([error.id for error in session_cache_is_shared(None)], ['users.W012'])
+        with override_settings(SESSION_ENGINE='django.contrib.sessions.backends.db'):
+            self.assertEqual(session_cache_is_shared(None), [])
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies')
+    def test_signed_cookies(self):
+        Session.objects.all().delete()
+        self.client.force_login(self.user)
+        self.assertEqual(Session.objects.count(), 0)
+        self.assertEqual(self.session_queries(), [])
+        self.assertContains(self.client.get(reverse('blogs:index')), 'alice')
+
+    def test_purge_sessions_in_batches(self):
+        Session.objects.all().delete()
+        past, future = timezone.now() - timedelta(days=1), timezone.now() + timedelta(days=1)
+        Session.objects.bulk_create(
+            [Session(session_key=f'old{i:05d}', session_data='', expire_date=past) for i in range(25)]
+            + [Session(session_key=f'new{i:05d}', session_data='', expire_date=future) for i in range(3)])
+
+        out = StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command('purge_sessions', batch_size=10, pause=0, stdout=out)
+        self.assertIn('25', out.getvalue())
+        self.assertEqual(Session.objects.count(), 3)
+        deletes = [q for q in queries.captured_queries if q['sql'].startswith('DELETE')]
+        self.assertEqual(len(deletes), 3)
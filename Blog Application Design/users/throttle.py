@@ -0,0 +1,71 @@
+"""
+登录失败次数限制。
+
+失败次数按用户名和来源 IP 分别计在数据库里（LoginFailure），超过上限后窗口期内的登录请求
+在校验密码之前就被拒绝，暴力破解的请求不会再消耗密码哈希的 CPU。
+计数从第一次失败开始，LOGIN_THROTTLE_WINDOW 秒后自动清零；登录成功时清掉该用户名的计数。
+
+计数不放缓存：所有工作进程要看到同一份计数，而文件缓存等后端的 incr 是先读后写，
+并发的失败登录会少计，锁定可能被绕过。数据库里用 count = count + 1 原子地累加。
+"""
+import hashlib
+import ipaddress
+
+from django.conf import settings
+
+from .models import LoginFailure
+
+
+def client_ip(request):
+    """
+    客户端 IP。默认是 REMOTE_ADDR；部署在反向代理后面时，
+    LOGIN_THROTTLE_IP_HEADER 指定代理写入的头（例如 'HTTP_X_FORWARDED_FOR'），
+    取其中倒数第 LOGIN_THROTTLE_TRUSTED_PROXIES 个地址：更靠左的部分客户端可以随意伪造
+    """
+    ip = request.META.get('REMOTE_ADDR', '')
+    header = getattr(settings, 'LOGIN_THROTTLE_IP_HEADER', None)
+    if header:
+        hops = [hop.strip() for hop in request.META.get(header, '').split(',') if hop.strip()]
+        trusted = getattr(settings, 'LOGIN_THROTTLE_TRUSTED_PROXIES', 1)
+        if len(hops) >= trusted:
+            ip = hops[-trusted]
+    # 统一写法，同一个地址（例如 IPv6 的不同写法）只对应一个计数
+    try:
+        return str(ipaddress.ip_address(ip))
+    except ValueError:
+        return 'unknown'
+
+
+def _user_key(username):
+    # 用户名可能很长或带特殊字符，取摘要作为 key
+    return 'user:' + hashlib.md5(username.strip().lower().encode()).hexdigest()
+
+
+def _ip_key(request):
+    return 'ip:' + client_ip(request)
+
+
+def _keys(request, username):
+    """计数 key -> 失败次数上限"""
+    return {
+        _user_key(username): getattr(settings, 'LOGIN_THROTTLE_ATTEMPTS', 5),
+        _ip_key(request): getattr(settings, 'LOGIN_THROTTLE_IP_ATTEMPTS', 20),
+    }
+
+
+def is_blocked(request, username):
+    """用户名或 IP 的失败次数已经达到上限"""
+    limits = _keys(request, username)
+    counts = LoginFailure.objects.counts(limits)
+    return any(counts.get(key, 0) >= limit for key, limit in limits.items())
+
+
+def record_failure(request, username):
+    # 窗口从第一次失败开始算
+    window = getattr(settings, 'LOGIN_THROTTLE_WINDOW', 300)
+    for key in _keys(request, username):
+        LoginFailure.objects.record(key, window)
+
+
+def reset(username):
+    LoginFailure.objects.filter(key=_user_key(username)).delete()
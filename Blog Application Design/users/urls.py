@@ -3,6 +3,8 @@ from . import views
 
 app_name = 'users'
 urlpatterns = [
+    # 带失败次数限制的登录页，要放在默认的 login/ 之前
+    path('login/', views.ThrottledLoginView.as_view(), name='login'),
     # Django默认的身份验证URL (包含 login/)
     path('', include('django.contrib.auth.urls')),
     # 注册页面
@@ -4,6 +4,9 @@ from django.shortcuts import render
 from django.shortcuts import render, redirect
 from django.contrib.auth import login
 from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.views import LoginView
+
+from . import throttle
 
 
 def register(request):
@@ -19,4 +22,24 @@ def register(request):
             return redirect('blogs:index')
 
     context = {'form': form}
-    return render(request, 'registration/register.html', context)
\ No newline at end of file
+    return render(request, 'registration/register.html', context)
+
+
+class ThrottledLoginView(LoginView):
+    """登录页：失败次数过多时直接拒绝，不再校验密码"""
+
+    def post(self, request, *args, **kwargs):
+        username = request.POST.get('username', '')
+        if throttle.is_blocked(request, username):
+            # 不绑定提交的数据，免得渲染表单时触发校验（也就是密码哈希）
+            context = self.get_context_data(form=self.get_form_class()(request), throttled=True)
+            return self.render_to_response(context, status=429)
+        return super().post(request, *args, **kwargs)
+
+    def form_valid(self, form):
+        throttle.reset(form.cleaned_data['username'])
+        return super().form_valid(form)
+
+    def form_invalid(self, form):
+        throttle.record_failure(self.request, self.request.POST.get('username', ''))
+        return super().form_invalid(form)
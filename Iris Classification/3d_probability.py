@@ -4,6 +4,8 @@ from sklearn.datasets import load_iris
 from sklearn.linear_model import LogisticRegression
 from mpl_toolkits.mplot3d import Axes3D
 
+from evaluation import grid_proba
+
 # --- 1. 风格与数据 ---
 plt.style.use('seaborn-v0_8-whitegrid')
 
@@ -31,37 +33,28 @@ ax = fig.add_subplot(111, projection='3d')
 
 # --- 3. 绘制墙面投影 (Wall Projections) ---
 # 定义一个辅助函数来画投影
-def plot_projection(ax, xx, yy, zz, zdir, offset):
-    """辅助函数：计算概率并画出 contourf"""
-    # 将网格展平为 (n_samples, 3) 的坐标点
-    grid = np.c_[xx.ravel(), yy.ravel(), zz.ravel()]
-    # 预测概率
-    probs = clf.predict_proba(grid)[:, 1].reshape(xx.shape)
+def plot_projection(ax, zdir, offset):
+    """辅助函数：在 zdir 方向、坐标为 offset 的墙面上计算概率并画出 contourf"""
+    # 固定的那一维取 offset，另外两维组成网格
+    fixed_axis = 'xyz'.index(zdir)
+    features = tuple(i for i in range(3) if i != fixed_axis)
+    limits = [(x_min, x_max), (y_min, y_max), (z_min, z_max)]
+    # 由粗到细采样，只在等概率线附近加密；结果按模型和网格缓存 (见 evaluation.py)
+    grid = grid_proba(clf, limits[features[0]], limits[features[1]], (res, res),
+                      features=features, fixed={fixed_axis: offset}, depth=3, prob_levels=(0.2, 0.5, 0.8))
     # 绘制等高线 (coolwarm: 蓝=0 -> 红=1)
-    ax.contourf(xx if zdir!='x' else probs, # 这里利用 trick 适配不同轴
-                yy if zdir!='y' else probs,
-                zz if zdir!='z' else probs,
-                zdir=zdir, offset=offset, cmap='coolwarm', alpha=0.6)
+    # contourf 的 trick：被投影的那一维位置上传概率，其余两维传网格坐标
+    coords = {features[0]: grid.xx, features[1]: grid.yy, fixed_axis: grid.probs[:, :, 1]}
+    ax.contourf(coords[0], coords[1], coords[2], zdir=zdir, offset=offset, cmap='coolwarm', alpha=0.5)
 
 # A. 底部投影 (XY平面)
-xx, yy = np.meshgrid(np.linspace(x_min, x_max, res), np.linspace(y_min, y_max, res))
-zz_const = np.full_like(xx, z_min)
-# 手动调用绘图 (因为 contourf 的参数传递比较特殊，直接写更直观)
-grid_bottom = np.c_[xx.ravel(), yy.ravel(), zz_const.ravel()]
-probs_bottom = clf.predict_proba(grid_bottom)[:, 1].reshape(xx.shape)
-ax.contourf(xx, yy, probs_bottom, zdir='z', offset=z_min, cmap='coolwarm', alpha=0.5)
+plot_projection(ax, 'z', z_min)
 
 # B. 左侧投影 (YZ平面)
-yy_side, zz_side = np.meshgrid(np.linspace(y_min, y_max, res), np.linspace(z_min, z_max, res))
-grid_side = np.c_[np.full(yy_side.size, x_min), yy_side.ravel(), zz_side.ravel()]
-probs_side = clf.predict_proba(grid_side)[:, 1].reshape(yy_side.shape)
-ax.contourf(probs_side, yy_side, zz_side, zdir='x', offset=x_min, cmap='coolwarm', alpha=0.5)
+plot_projection(ax, 'x', x_min)
 
 # C. 背面投影 (XZ平面)
-xx_back, zz_back = np.meshgrid(np.linspace(x_min, x_max, res), np.linspace(z_min, z_max, res))
-grid_back = np.c_[xx_back.ravel(), np.full(xx_back.size, y_max), zz_back.ravel()]
-probs_back = clf.predict_proba(grid_back)[:, 1].reshape(xx_back.shape)
-ax.contourf(xx_back, probs_back, zz_back, zdir='y', offset=y_max, cmap='coolwarm', alpha=0.5)
+plot_projection(ax, 'y', y_max)
 
 # --- 4. 绘制中间的决策网格 (Wireframe) ---
 w = clf.coef_[0]
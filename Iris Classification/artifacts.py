@@ -0,0 +1,138 @@
+"""
+磁盘上的计算结果缓存：训练好的模型和算好的网格。
+
+缓存文件放在项目目录下的 .cache/ (可用环境变量 IRIS_CACHE_DIR 修改)，
+文件名是参数的哈希：
+- 模型：估计器类名、全部参数、训练数据和 scikit-learn 版本，任何一项变了都会重新训练；
+- 网格：模型指纹 (见 evaluation.fingerprint) 和网格参数。
+
+总大小超过 IRIS_CACHE_MAX_MB (默认 200MB) 时按最近使用时间淘汰最旧的文件。
+读到损坏的文件当作没有缓存，直接重新计算。
+"""
+import os
+import tempfile
+from pathlib import Path
+
+import joblib
+import numpy as np
+import sklearn
+
+from evaluation import GridResult, fingerprint, grid_proba
+
+CACHE_DIR = Path(os.environ.get('IRIS_CACHE_DIR', Path(__file__).resolve().parent / '.cache'))
+MAX_CACHE_BYTES = int(float(os.environ.get('IRIS_CACHE_MAX_MB', 200)) * 1024 * 1024)
+
+# 网格的计算规则 (boundary.adaptive_grid、evaluation.grid_proba) 改变时加一，旧的缓存文件就不会再被读到
+GRID_VERSION = 3
+
+# 只影响计算方式、不影响结果的参数，不参与网格的缓存键
+_GRID_RUNTIME_ARGS = ('executor', 'workers', 'chunk_size')
+
+
+def cached_fit(clf, X, y):
+    """
+    训练模型，或者从缓存里读出用同样参数、同样数据训练过的模型。
+    clf 本身不会被修改，返回的是训练好的 (新) 对象
+    """
+    # joblib.hash 连内存布局 (步长、C/F 顺序) 一起哈希：iris.data[:, 2:] 这样的切片视图
+    # 传到子进程后会变成连续的副本，不先统一布局的话，串行和并行训练会各存一份
+    key = joblib.hash((type(clf).__module__, type(clf).__qualname__, clf.get_params(deep=True),
+                       np.ascontiguousarray(X), np.ascontiguousarray(y), sklearn.__version__))
+    path = CACHE_DIR / f'model-{key}.joblib'
+    model = _load(path, joblib.load)
+    if model is None:
+        model = sklearn.clone(clf).fit(X, y)
+        _save(path, lambda tmp: joblib.dump(model, tmp))
+    return model
+
+
+def cached_arrays(name, key_parts, compute):
+    """
+    缓存返回若干个 numpy 数组的计算：命中时直接读出，否则调用 compute() 并写入缓存。
+    key_parts 是决定结果的全部输入 (会被哈希)；返回数组的元组
+    """
+    path = CACHE_DIR / f'{name}-{joblib.hash(key_parts)}.npz'
+    arrays = _load(path, _read_npz)
+    if arrays is None:
+        arrays = tuple(np.asarray(array) for array in compute())
+        _save(path, lambda tmp: np.savez(tmp, *arrays))
+    return arrays
+
+
+def cached_grid_proba(model, x_range, y_range, shape, **grid_args):
+    """evaluation.grid_proba 加一层磁盘缓存，参数相同"""
+    key_args = {name: value for name, value in grid_args.items() if name not in _GRID_RUNTIME_ARGS}
+    key_parts = (GRID_VERSION, fingerprint(model), tuple(map(float, x_range)), tuple(map(float, y_range)),
+                 tuple(shape), sorted(key_args.items()))
+
+    def compute():
+        grid = grid_proba(model, x_range, y_range, shape, **grid_args)
+        return grid.xx, grid.yy, grid.probs, grid.labels, grid.n_evaluated
+
+    xx, yy, probs, labels, n_evaluated = cached_arrays('grid', key_parts, compute)
+    return GridResult(xx, yy, probs, labels, int(n_evaluated))
+
+
+def clear():
+    """删除全部缓存文件"""
+    for path in _entries():
+        path.unlink(missing_ok=True)
+
+
+def _read_npz(path):
+    with np.load(path, allow_pickle=False) as data:
+        return tuple(data[f'arr_{i}'] for i in range(len(data.files)))
+
+
+def _load(path, reader):
+    try:
+        result = reader(path)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        # 写到一半被打断、版本不兼容等：删掉重算
+        path.unlink(missing_ok=True)
+        return None
+    # 用修改时间记录最近一次使用，淘汰时按它排序
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass
+    return result
+
+
+def _save(path, writer):
+    """先写临时文件再改名，多个进程同时写同一个键也不会读到半个文件"""
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=CACHE_DIR, prefix='.tmp-', suffix=path.suffix)
+    os.close(fd)
+    try:
+        writer(tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+    _evict()
+
+
+def _entries():
+    if not CACHE_DIR.is_dir():
+        return []
+    return [path for path in CACHE_DIR.iterdir() if path.is_file() and not path.name.startswith('.tmp-')]
+
+
+def _evict():
+    """总大小超出上限时，从最久没用的文件开始删"""
+    entries = []
+    for path in _entries():
+        try:
+            stat = path.stat()
+        except FileNotFoundError:  # 被别的进程删掉了
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+        if total <= MAX_CACHE_BYTES:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
@@ -5,6 +5,8 @@ import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.colors as mcolors
 
+from evaluation import grid_proba
+
 # 加载Iris数据集
 iris = load_iris()
 X = iris.data[:, 2:]  # 选择后两个特征进行可视化
@@ -18,12 +20,13 @@ model = LogisticRegression(max_iter=200)
 model.fit(X_train, y_train)
 
 # 可视化决策边界
-xx, yy = np.meshgrid(np.arange(X[:, 0].min() - 1, X[:, 0].max() + 1, 0.1),
-                     np.arange(X[:, 1].min() - 1, X[:, 1].max() + 1, 0.1))
-
-# 使用 predict_proba 方法获取每个点的概率
-probs = model.predict_proba(np.c_[xx.ravel(), yy.ravel()])
-probs = probs.reshape(xx.shape[0], xx.shape[1], 3)  # reshape to (height, width, classes)
+# 由粗到细采样：只在类别边界附近加密，其余区域由角点插值（见 boundary.py、evaluation.py）
+x_range = (X[:, 0].min() - 1, X[:, 0].max() + 1)
+y_range = (X[:, 1].min() - 1, X[:, 1].max() + 1)
+shape = (int(np.ptp(y_range) / 0.1) + 1, int(np.ptp(x_range) / 0.1) + 1)
+grid = grid_proba(model, x_range, y_range, shape, depth=3)
+xx, yy, probs = grid.xx, grid.yy, grid.probs
+print(f"网格 {xx.shape[0]}x{xx.shape[1]}，实际计算 {grid.n_evaluated} 个点")
 
 # 设置每个类别的固定颜色
 class_colors = ['yellow', 'green', 'blue']  # 自定义颜色：黄、绿、蓝
@@ -32,8 +35,8 @@ class_colors = ['yellow', 'green', 'blue']  # 自定义颜色：黄、绿、蓝
 fig, axs = plt.subplots(1, 4, figsize=(20, 5))
 
 # **1. 整体决策边界图**
-Z = model.predict(np.c_[xx.ravel(), yy.ravel()])
-Z = Z.reshape(xx.shape)
+# 逻辑回归的 predict 就是概率取 argmax，类别直接由概率得到，不必再算一遍
+Z = grid.labels
 
 #  **使用imshow绘制决策区域**
 # 使用 Z 来填充区域，确保每个类别的区域有不同的颜色
@@ -1,3 +1,6 @@
+import argparse
+import time
+
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.colors as mcolors
@@ -7,6 +10,10 @@ from sklearn.svm import SVC
 from sklearn.gaussian_process import GaussianProcessClassifier
 from sklearn.gaussian_process.kernels import RBF
 
+from artifacts import cached_fit, cached_grid_proba
+from evaluation import grid_proba
+from parallel import fit_and_evaluate
+
 # --- 1. 统一风格与字体设置 ---
 plt.style.use('seaborn-v0_8-whitegrid')
 
@@ -31,53 +38,87 @@ classifiers = {
 }
 
 # --- 4. 绘图准备 ---
-# 创建网格用于绘制背景颜色
+# 背景网格的范围和分辨率；网格由 evaluation.grid_proba 生成，只在类别边界附近按 h 的间隔加密
 h = 0.05
 x_min, x_max = X[:, 0].min() - 1, X[:, 0].max() + 1
 y_min, y_max = X[:, 1].min() - 1, X[:, 1].max() + 1
-xx, yy = np.meshgrid(np.arange(x_min, x_max, h),
-                     np.arange(y_min, y_max, h))
-
-n_classifiers = len(classifiers)
-# 创建大图：行数=模型数，列数=4 (1个决策图 + 3个概率图)
-fig, axes = plt.subplots(n_classifiers, 4, figsize=(20, 5 * n_classifiers))
-
-# --- 5. 循环训练并绘图 ---
-for i, (name, clf) in enumerate(classifiers.items()):
-    print(f"正在训练模型: {name}...")
-    clf.fit(X, y)
-
-    # 获取当前行的坐标轴对象
-    row_axes = axes[i] if n_classifiers > 1 else axes
-
-    # [第1列] 绘制整体决策边界
-    Z = clf.predict(np.c_[xx.ravel(), yy.ravel()])
-    Z = Z.reshape(xx.shape)
-
-    row_axes[0].imshow(Z, extent=(xx.min(), xx.max(), yy.min(), yy.max()), origin='lower',
-                       cmap=cmap_boundary, alpha=0.4)  # 背景色半透明
-    # 绘制原始数据点
-    row_axes[0].scatter(X[:, 0], X[:, 1], c=y, cmap=cmap_boundary, edgecolors='k', s=50)
-    row_axes[0].set_title(f"{name}\n决策边界 (Decision Boundary)")
-    row_axes[0].set_ylabel('Petal Width')
-
-    # [第2-4列] 绘制每一类的概率分布
-    probs = clf.predict_proba(np.c_[xx.ravel(), yy.ravel()])
-    probs = probs.reshape(xx.shape[0], xx.shape[1], 3)
-
-    for j in range(3):
-        ax = row_axes[j + 1]
-        # 创建单色渐变 colormap (白色 -> 该类的主色)
-        cmap_prob = mcolors.LinearSegmentedColormap.from_list(f'c{j}', ['#ffffff', class_colors[j]])
-
-        # 绘制概率等高线
-        contour = ax.contourf(xx, yy, probs[:, :, j], levels=20, cmap=cmap_prob, alpha=0.8)
-        # 绘制数据点 (为了对比，还是画上)
-        ax.scatter(X[:, 0], X[:, 1], c=y, cmap=cmap_boundary, edgecolors='k', s=20, alpha=0.6)
-
-        ax.set_title(f"类别 {j} ({iris.target_names[j]}) 概率")
-        if i == n_classifiers - 1:  # 只在最后一行加X轴标签
-            ax.set_xlabel('Petal Length')
-
-plt.tight_layout()
-plt.show()
\ No newline at end of file
+# 概率图画 20 级等高线，这几个等级附近也要加密，插值误差才不明显
+grid_args = dict(x_range=(x_min, x_max), y_range=(y_min, y_max),
+                 shape=(int((y_max - y_min) / h) + 1, int((x_max - x_min) / h) + 1),
+                 prob_levels=(0.25, 0.5, 0.75))
+
+
+# --- 5. 训练并计算网格 ---
+def fit_and_evaluate_serial(cache=True):
+    """逐个训练模型并计算网格，返回 {名称: (训练好的模型, GridResult)}"""
+    results = {}
+    for name, clf in classifiers.items():
+        print(f"正在训练模型: {name}...")
+        if cache:
+            # 参数和数据都没变时直接读出上次训练好的模型和网格 (见 artifacts.py)
+            clf = cached_fit(clf, X, y)
+            results[name] = (clf, cached_grid_proba(clf, **grid_args))
+        else:
+            clf.fit(X, y)
+            # 由粗到细计算概率 (GP 这类慢模型的调用次数能少一个数量级)
+            results[name] = (clf, grid_proba(clf, **grid_args))
+    return results
+
+
+# 并行模式会启动子进程，子进程导入本文件时不能再执行下面的训练和绘图
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='2D 多分类器边界对比')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='进程数：1 为逐个训练 (默认)，0 为使用全部 CPU 并行训练和计算网格')
+    parser.add_argument('--no-cache', dest='cache', action='store_false',
+                        help='不读写 .cache/ 中的模型和网格缓存，全部重新计算')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.jobs == 1:
+        results = fit_and_evaluate_serial(args.cache)
+    else:
+        print(f"并行训练 {len(classifiers)} 个模型...")
+        results = fit_and_evaluate(classifiers, X, y, grid_args, jobs=args.jobs or None, cache=args.cache)
+    for name, (clf, grid) in results.items():
+        print(f"  {name}: 网格 {grid.xx.shape[0]}x{grid.xx.shape[1]}，实际计算 {grid.n_evaluated} 个点")
+    print(f"训练和计算共用时 {time.perf_counter() - start:.2f}s")
+
+    n_classifiers = len(classifiers)
+    # 创建大图：行数=模型数，列数=4 (1个决策图 + 3个概率图)
+    fig, axes = plt.subplots(n_classifiers, 4, figsize=(20, 5 * n_classifiers))
+
+    # --- 6. 逐行绘图 ---
+    for i, (name, (clf, grid)) in enumerate(results.items()):
+        # 获取当前行的坐标轴对象
+        row_axes = axes[i] if n_classifiers > 1 else axes
+
+        xx, yy, probs = grid.xx, grid.yy, grid.probs
+
+        # [第1列] 绘制整体决策边界 (与 predict 一致；SVM 的类别单独用 predict 计算，见 evaluation.py)
+        Z = grid.labels
+
+        row_axes[0].imshow(Z, extent=(xx.min(), xx.max(), yy.min(), yy.max()), origin='lower',
+                           cmap=cmap_boundary, alpha=0.4)  # 背景色半透明
+        # 绘制原始数据点
+        row_axes[0].scatter(X[:, 0], X[:, 1], c=y, cmap=cmap_boundary, edgecolors='k', s=50)
+        row_axes[0].set_title(f"{name}\n决策边界 (Decision Boundary)")
+        row_axes[0].set_ylabel('Petal Width')
+
+        # [第2-4列] 绘制每一类的概率分布
+        for j in range(3):
+            ax = row_axes[j + 1]
+            # 创建单色渐变 colormap (白色 -> 该类的主色)
+            cmap_prob = mcolors.LinearSegmentedColormap.from_list(f'c{j}', ['#ffffff', class_colors[j]])
+
+            # 绘制概率等高线
+            contour = ax.contourf(xx, yy, probs[:, :, j], levels=20, cmap=cmap_prob, alpha=0.8)
+            # 绘制数据点 (为了对比，还是画上)
+            ax.scatter(X[:, 0], X[:, 1], c=y, cmap=cmap_boundary, edgecolors='k', s=20, alpha=0.6)
+
+            ax.set_title(f"类别 {j} ({iris.target_names[j]}) 概率")
+            if i == n_classifiers - 1:  # 只在最后一行加X轴标签
+                ax.set_xlabel('Petal Length')
+
+    plt.tight_layout()
+    plt.show()
\ No newline at end of file
@@ -0,0 +1,144 @@
+import functools
+import threading
+from collections import OrderedDict, namedtuple
+
+import joblib
+import numpy as np
+from sklearn.svm import SVC, NuSVC
+
+from boundary import adaptive_grid
+
+# 网格计算结果：probs 形状为 (ny, nx, n_classes)，labels 是 predict 给出的类别 (见 grid_proba)
+GridResult = namedtuple('GridResult', ['xx', 'yy', 'probs', 'labels', 'n_evaluated'])
+
+# 进程内最多缓存多少张网格，超出后丢掉最久没用的
+MAX_CACHED_GRIDS = 32
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+# 并行计算时每份至少这么多点，再少的话进程间传输的开销比计算还大
+MIN_POINTS_PER_WORKER = 500
+
+
+def grid_proba(model, x_range, y_range, shape, features=(0, 1), fixed=None,
+               adaptive=True, depth=4, prob_levels=(0.5,), tol=0.02, chunk_size=100_000, executor=None, workers=1):
+    """
+    在二维网格上计算已训练模型的 predict_proba 和类别。
+
+    类别一般由概率取 argmax 得到，不用再调 predict；
+    predict 和概率不一致的模型 (见 proba_matches_predict) 另外对 predict 做一遍自适应采样，
+    得到的 labels 与逐点调用 predict 相同。
+
+    features: 网格的横、纵轴分别对应模型的第几个特征
+    fixed: {特征下标: 取值}，模型其余特征固定在这些值上 (例如三维模型的墙面投影)
+    adaptive: True 时用 boundary.adaptive_grid 由粗到细采样，False 时逐点计算整张网格
+    depth, prob_levels, tol: 见 boundary.adaptive_grid，tol 是未细分格子允许的插值误差
+    chunk_size: 每次交给模型的最大点数，分辨率很高时也不会一次占用太多内存
+    executor, workers: 传入进程池时，每批点至少拆成 workers 份交给进程池并行计算
+
+    结果按 (模型指纹, 网格参数, 特征组合) 缓存在进程内，同样的参数再画一次不需要重新计算。
+    返回的数组是只读的，需要修改时请先 copy()。
+    """
+    fixed = dict(fixed or {})
+    key = (fingerprint(model), tuple(map(float, x_range)), tuple(map(float, y_range)), tuple(shape),
+           tuple(features), tuple(sorted(fixed.items())),
+           adaptive, (depth, tuple(prob_levels), tol) if adaptive else None)
+    with _cache_lock:
+        result = _cache.get(key)
+        if result is not None:
+            _cache.move_to_end(key)
+            return result
+
+    func = embedded(model.predict_proba, model.n_features_in_, features, fixed, chunk_size, executor, workers)
+    if adaptive:
+        xx, yy, probs, n_evaluated = adaptive_grid(func, x_range, y_range, shape, depth, prob_levels, tol)
+    else:
+        xx, yy = np.meshgrid(np.linspace(*x_range, shape[1]), np.linspace(*y_range, shape[0]))
+        probs = func(np.c_[xx.ravel(), yy.ravel()]).reshape(shape[0], shape[1], -1)
+        n_evaluated = xx.size
+
+    if proba_matches_predict(model):
+        labels = model.classes_[probs.argmax(axis=2)]
+    else:
+        func = embedded(functools.partial(predict_one_hot, model), model.n_features_in_, features, fixed,
+                        chunk_size, executor, workers)
+        if adaptive:
+            # 只按类别是否一致细分；类别相同的格子里 one-hot 插值后还是同一类
+            _, _, votes, n_predicted = adaptive_grid(func, x_range, y_range, shape, depth, prob_levels=(), tol=None)
+        else:
+            votes = func(np.c_[xx.ravel(), yy.ravel()]).reshape(shape[0], shape[1], -1)
+            n_predicted = xx.size
+        labels = model.classes_[votes.argmax(axis=2)]
+        n_evaluated += n_predicted
+    for array in (xx, yy, probs, labels):
+        array.setflags(write=False)
+
+    result = GridResult(xx, yy, probs, labels, n_evaluated)
+    with _cache_lock:
+        _cache[key] = result
+        if len(_cache) > MAX_CACHED_GRIDS:
+            _cache.popitem(last=False)
+    return result
+
+
+def proba_matches_predict(model):
+    """
+    predict 的结果是否就是 predict_proba 取 argmax。
+    SVC / NuSVC 的 predict 看决策函数的符号，概率却是另外用 Platt 缩放拟合出来的，
+    两者在类别边界附近并不一致
+    """
+    return not isinstance(model, (SVC, NuSVC))
+
+
+def predict_one_hot(model, points):
+    """把 predict 的结果写成 (n, n_classes) 的 0/1 矩阵，可以像概率一样交给 adaptive_grid"""
+    return (model.predict(points)[:, None] == model.classes_).astype(float)
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+def fingerprint(model):
+    """
+    模型指纹：按内容计算的哈希 (joblib.hash)。
+    参数或训练结果 (系数、支持向量等) 任何一项变化，指纹都会变；
+    同一个模型存盘再读回来，指纹不变。
+    注意 joblib.hash 对数组连同 dtype 和内存布局 (步长、C/F 顺序) 一起哈希，
+    数据相同、布局不同的两个模型指纹也不同
+    """
+    return joblib.hash(model)
+
+
+def embedded(func, n_features, features, fixed, chunk_size, executor=None, workers=1):
+    """
+    把接收 (n, n_features) 的 func 包装成接收 (n, 2) 网格坐标的函数：
+    网格两列放到 features 指定的位置，其余特征填 fixed 中的常数，并分块调用
+    """
+    missing = set(range(n_features)) - set(features) - set(fixed)
+    if missing:
+        raise ValueError(f"特征 {sorted(missing)} 既不在网格上也没有在 fixed 中给出取值")
+
+    def grid_func(points):
+        full = np.empty((len(points), n_features))
+        for column, value in fixed.items():
+            full[:, column] = value
+        full[:, list(features)] = points
+        return chunked(func, full, chunk_size, executor, workers)
+    return grid_func
+
+
+def chunked(func, points, chunk_size, executor=None, workers=1):
+    """
+    分块调用 func，拼接结果。
+    给了 executor 时每块交给 executor.map 并行计算，点数够多时至少分成 workers 块
+    """
+    n_chunks = -(-len(points) // chunk_size)
+    if executor is not None:
+        n_chunks = max(n_chunks, min(workers, len(points) // MIN_POINTS_PER_WORKER))
+    if n_chunks <= 1:
+        return np.asarray(func(points))
+    parts = np.array_split(points, n_chunks)
+    results = executor.map(func, parts) if executor is not None else map(func, parts)
+    return np.concatenate(list(results))
@@ -4,6 +4,10 @@ from sklearn.datasets import load_iris
 from sklearn.svm import SVC
 from mpl_toolkits.mplot3d import Axes3D
 
+from artifacts import cached_arrays, cached_fit, cached_grid_proba
+from evaluation import fingerprint
+from surface import solve_surface_z
+
 # --- 1. 风格与数据 ---
 plt.style.use('seaborn-v0_8-whitegrid')
 
@@ -17,9 +21,9 @@ X = iris.data[mask][:, :3]
 y = iris.target[mask]
 
 # --- 2. 训练非线性模型 (RBF Kernel SVM) ---
+# 参数和数据不变时直接读出上次训练好的模型 (缓存在 .cache/ 下，见 artifacts.py)
 print("正在训练 SVM 模型...")
-clf = SVC(kernel='rbf', C=10, gamma='auto', probability=True, random_state=42)
-clf.fit(X, y)
+clf = cached_fit(SVC(kernel='rbf', C=10, gamma='auto', probability=True, random_state=42), X, y)
 
 # --- 3. 绘图范围 ---
 x_min, x_max = 3.8, 7.5
@@ -30,57 +34,42 @@ fig = plt.figure(figsize=(14, 12))
 ax = fig.add_subplot(111, projection='3d')
 
 # --- 4. 核心：数值求解非线性曲面 Z ---
-res_surf = 30 # 曲面分辨率
-xx_surf, yy_surf = np.meshgrid(np.linspace(x_min, x_max, res_surf),
-                               np.linspace(y_min, y_max, res_surf))
-zz_surf = np.zeros_like(xx_surf)
-zz_surf[:] = np.nan
-
-# 在 Z 轴方向扫描寻找决策边界 (decision_function = 0)
-z_scan = np.linspace(z_min, z_max, 100)
-
-print("正在计算非线性 3D 曲面，请稍候...")
-for i in range(res_surf):
-    for j in range(res_surf):
-        # 构造扫描线
-        scan_points = np.c_[np.full(100, xx_surf[i, j]), np.full(100, yy_surf[i, j]), z_scan]
-        # 计算距离
-        dists = clf.decision_function(scan_points)
-        # 寻找符号翻转点 (即过零点)
-        crossings = np.where(np.diff(np.sign(dists)))[0]
-        if len(crossings) > 0:
-            idx = crossings[0]
-            # 线性插值求精确的 z
-            d1, d2 = dists[idx], dists[idx+1]
-            z1, z2 = z_scan[idx], z_scan[idx+1]
-            zz_surf[i, j] = z1 + (z2 - z1) * (-d1 / (d2 - d1))
+# 沿 Z 轴扫描寻找决策边界 (decision_function = 0)，整个网格批量计算后再向量化二分求精，
+# 见 surface.py；200x200 的分辨率也不到一秒
+res_surf = 200 # 曲面分辨率
+print("正在计算非线性 3D 曲面...")
+surf_args = (np.linspace(x_min, x_max, res_surf), np.linspace(y_min, y_max, res_surf), z_min, z_max)
+xx_surf, yy_surf, zz_surf = cached_arrays('surface', (fingerprint(clf), surf_args),
+                                          lambda: solve_surface_z(clf.decision_function, *surf_args))
 
 # 绘制曲面 (使用 viridis 颜色，半透明)
 surf = ax.plot_surface(xx_surf, yy_surf, zz_surf, cmap='viridis', alpha=0.6,
                        rstride=1, cstride=1, edgecolor='none')
 # 添加线框增强立体感
-ax.plot_wireframe(xx_surf, yy_surf, zz_surf, color='black', alpha=0.15, rstride=3, cstride=3)
+ax.plot_wireframe(xx_surf, yy_surf, zz_surf, color='black', alpha=0.15, rstride=20, cstride=20)
 
 # --- 5. 绘制墙面投影 (含黑色轮廓线) ---
-res_proj = 50
+# 投影由粗到细采样并按模型缓存 (见 evaluation.py)，RBF 核的概率只在分界线附近有变化，
+# 同样的计算量可以把分辨率从 50 提到 129
+res_proj = 129
 # A. 底部投影
-xx, yy = np.meshgrid(np.linspace(x_min, x_max, res_proj), np.linspace(y_min, y_max, res_proj))
-grid_bottom = np.c_[xx.ravel(), yy.ravel(), np.full_like(xx.ravel(), z_min)]
-probs_bottom = clf.predict_proba(grid_bottom)[:, 1].reshape(xx.shape)
+grid = cached_grid_proba(clf, (x_min, x_max), (y_min, y_max), (res_proj, res_proj),
+                         features=(0, 1), fixed={2: z_min})
+xx, yy, probs_bottom = grid.xx, grid.yy, grid.probs[:, :, 1]
 ax.contourf(xx, yy, probs_bottom, zdir='z', offset=z_min, cmap='coolwarm', alpha=0.5)
 ax.contour(xx, yy, probs_bottom, levels=[0.5], zdir='z', offset=z_min, colors='black', linewidths=2) # 黑色分界线
 
 # B. 左侧投影
-yy_side, zz_side = np.meshgrid(np.linspace(y_min, y_max, res_proj), np.linspace(z_min, z_max, res_proj))
-grid_side = np.c_[np.full(yy_side.size, x_min), yy_side.ravel(), zz_side.ravel()]
-probs_side = clf.predict_proba(grid_side)[:, 1].reshape(yy_side.shape)
+grid = cached_grid_proba(clf, (y_min, y_max), (z_min, z_max), (res_proj, res_proj),
+                         features=(1, 2), fixed={0: x_min})
+yy_side, zz_side, probs_side = grid.xx, grid.yy, grid.probs[:, :, 1]
 ax.contourf(probs_side, yy_side, zz_side, zdir='x', offset=x_min, cmap='coolwarm', alpha=0.5)
 ax.contour(probs_side, yy_side, zz_side, levels=[0.5], zdir='x', offset=x_min, colors='black', linewidths=2)
 
 # C. 背面投影
-xx_back, zz_back = np.meshgrid(np.linspace(x_min, x_max, res_proj), np.linspace(z_min, z_max, res_proj))
-grid_back = np.c_[xx_back.ravel(), np.full(xx_back.size, y_max), zz_back.ravel()]
-probs_back = clf.predict_proba(grid_back)[:, 1].reshape(xx_back.shape)
+grid = cached_grid_proba(clf, (x_min, x_max), (z_min, z_max), (res_proj, res_proj),
+                         features=(0, 2), fixed={1: y_max})
+xx_back, zz_back, probs_back = grid.xx, grid.yy, grid.probs[:, :, 1]
 ax.contourf(xx_back, probs_back, zz_back, zdir='y', offset=y_max, cmap='coolwarm', alpha=0.5)
 ax.contour(xx_back, probs_back, zz_back, levels=[0.5], zdir='y', offset=y_max, colors='black', linewidths=2)
 
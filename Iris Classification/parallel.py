@@ -0,0 +1,37 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from artifacts import cached_fit, cached_grid_proba
+from evaluation import grid_proba
+
+
+def fit(clf, X, y, cache):
+    """在子进程里训练，返回训练好的模型 (会被序列化传回主进程)"""
+    return cached_fit(clf, X, y) if cache else clf.fit(X, y)
+
+
+def fit_and_evaluate(classifiers, X, y, grid_args, jobs=None, cache=True):
+    """
+    用进程池同时训练多个模型并计算各自的概率网格。
+
+    每个模型训练完就立刻开始算网格，不用等其他模型；网格的每一批点再拆给所有进程，
+    所以只剩一个慢模型 (比如高斯过程) 时其余进程也在帮它算。
+    主进程里每个模型一个线程负责调度 (自适应采样是逐层进行的)，真正的计算都在进程池里。
+
+    classifiers: {名称: 未训练的模型}
+    grid_args: 传给 evaluation.grid_proba 的网格参数 (x_range, y_range, shape 等)
+    jobs: 进程数，默认用全部 CPU
+    cache: 是否使用磁盘缓存 (见 artifacts.py)；命中的模型和网格不再计算
+    返回 {名称: (训练好的模型, GridResult)}，顺序与 classifiers 相同
+    """
+    jobs = jobs or os.cpu_count()
+    with ProcessPoolExecutor(jobs) as pool:
+        fitted = {name: pool.submit(fit, clf, X, y, cache) for name, clf in classifiers.items()}
+        evaluate_grid = cached_grid_proba if cache else grid_proba
+
+        def evaluate(name):
+            clf = fitted[name].result()
+            return clf, evaluate_grid(clf, executor=pool, workers=jobs, **grid_args)
+
+        with ThreadPoolExecutor(len(classifiers)) as threads:
+            return dict(zip(classifiers, threads.map(evaluate, classifiers)))
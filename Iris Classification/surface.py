@@ -0,0 +1,64 @@
+import numpy as np
+
+from evaluation import chunked
+
+
+def solve_surface_z(decision, x_vals, y_vals, z_min, z_max, n_scan=20, n_refine=6, chunk_size=200_000):
+    """
+    数值求解隐函数曲面 decision(x, y, z) = 0，得到 z = f(x, y)。
+
+    做法：
+    1. 把整张 (len(y_vals), len(x_vals), n_scan) 的扫描网格一次性交给 decision 计算
+       （按 chunk_size 个点分块，避免核矩阵占用过多内存）；
+    2. 用数组运算找出每条扫描线上第一次变号的位置；
+    3. 对所有有交点的扫描线同时做 n_refine 步二分，每一步只调用一次 decision，
+       最后在区间两端做一次线性插值（割线）。
+
+    decision: 输入 (n, 3) 坐标数组、返回 (n,) 数组的函数，例如 clf.decision_function
+    返回 xx, yy, zz，形状都是 (len(y_vals), len(x_vals))，没有交点的位置 zz 为 nan
+    """
+    xx, yy = np.meshgrid(x_vals, y_vals)
+    xs, ys = xx.ravel(), yy.ravel()
+    n_lines = xs.size
+    z_scan = np.linspace(z_min, z_max, n_scan)
+
+    # --- 1. 整体扫描 ---
+    points = np.empty((n_lines, n_scan, 3))
+    points[:, :, 0] = xs[:, None]
+    points[:, :, 1] = ys[:, None]
+    points[:, :, 2] = z_scan[None, :]
+    dists = chunked(decision, points.reshape(-1, 3), chunk_size).reshape(n_lines, n_scan)
+
+    # --- 2. 找第一处变号 ---
+    signs = np.sign(dists)
+    changes = signs[:, :-1] != signs[:, 1:]
+    hit = changes.any(axis=1)
+    first = changes.argmax(axis=1)
+
+    zz = np.full(n_lines, np.nan)
+    rows = np.flatnonzero(hit)
+    if rows.size == 0:
+        return xx, yy, zz.reshape(xx.shape)
+    idx = first[rows]
+    lo, hi = z_scan[idx], z_scan[idx + 1]
+    d_lo, d_hi = dists[rows, idx], dists[rows, idx + 1]
+
+    # --- 3. 向量化二分 ---
+    line_x, line_y = xs[rows], ys[rows]
+    for _ in range(n_refine):
+        mid = (lo + hi) / 2
+        d_mid = chunked(decision, np.c_[line_x, line_y, mid], chunk_size)
+        # 和下端同号说明根在上半段
+        upper = np.sign(d_mid) == np.sign(d_lo)
+        lo = np.where(upper, mid, lo)
+        d_lo = np.where(upper, d_mid, d_lo)
+        hi = np.where(upper, hi, mid)
+        d_hi = np.where(upper, d_hi, d_mid)
+
+    # 割线插值；两端值相等（恰好落在根上）时取中点
+    denom = d_hi - d_lo
+    with np.errstate(divide='ignore', invalid='ignore'):
+        root = np.where(denom != 0, lo - d_lo * (hi - lo) / denom, (lo + hi) / 2)
+    zz[rows] = root
+    return xx, yy, zz.reshape(xx.shape)
+
@@ -0,0 +1,54 @@
+"""自适应采样与逐点计算的对比：python -m pytest test_boundary.py"""
+import numpy as np
+import pytest
+from sklearn.datasets import load_iris
+from sklearn.linear_model import LogisticRegression
+from sklearn.svm import SVC
+
+import artifacts
+from evaluation import grid_proba
+
+iris = load_iris()
+X = iris.data[:, 2:]
+y = iris.target
+x_range = (X[:, 0].min() - 1, X[:, 0].max() + 1)
+y_range = (X[:, 1].min() - 1, X[:, 1].max() + 1)
+
+MODELS = {
+    'lr': lambda: LogisticRegression(max_iter=200),
+    'svc': lambda: SVC(kernel='linear', probability=True, random_state=0),
+}
+
+
+@pytest.mark.parametrize('name', MODELS)
+@pytest.mark.parametrize('h, depth', [(0.1, 3), (0.05, 4)])
+def test_adaptive_grid_close_to_full_grid(name, h, depth):
+    model = MODELS[name]().fit(X, y)
+    shape = (int(np.ptp(y_range) / h) + 1, int(np.ptp(x_range) / h) + 1)
+    tol = 0.02
+    adaptive = grid_proba(model, x_range, y_range, shape, depth=depth, tol=tol)
+    # 用自适应网格实际的大小逐点计算，两张网格的点一一对应
+    full = grid_proba(model, x_range, y_range, adaptive.xx.shape, adaptive=False)
+
+    assert np.abs(adaptive.probs - full.probs).max() <= 1.5 * tol
+    assert adaptive.n_evaluated < full.n_evaluated / 2
+
+
+@pytest.mark.parametrize('name', MODELS)
+@pytest.mark.parametrize('adaptive', [True, False])
+def test_labels_match_predict(name, adaptive):
+    # SVC 的概率取 argmax 和 predict 在边界附近不一致，labels 必须以 predict 为准
+    model = MODELS[name]().fit(X, y)
+    grid = grid_proba(model, x_range, y_range, (45, 80), depth=3, adaptive=adaptive)
+    expected = model.predict(np.c_[grid.xx.ravel(), grid.yy.ravel()]).reshape(grid.xx.shape)
+    np.testing.assert_array_equal(grid.labels, expected)
+
+
+def test_cached_fit_ignores_memory_layout(tmp_path, monkeypatch):
+    # X 是 iris.data 的切片视图；并行时传到子进程的是连续副本，两者要命中同一个缓存文件
+    monkeypatch.setattr(artifacts, 'CACHE_DIR', tmp_path)
+    assert not X.flags.c_contiguous
+    artifacts.cached_fit(MODELS['lr'](), X, y)
+    artifacts.cached_fit(MODELS['lr'](), X.copy(), y)
+    artifacts.cached_fit(MODELS['lr'](), np.asfortranarray(X), y[::-1].copy()[::-1])
+    assert len(list(tmp_path.glob('model-*.joblib'))) == 1